@@ -0,0 +1,155 @@
+import io
+import os
+import random
+import sys
+import time
+
+import degrees
+import service
+from cache import PathCache
+from util import Node, StackFrontier, QueueFrontier
+
+SIZES = [10 ** 5, 10 ** 6]
+
+# Random queries generated for the scaling benchmark when no file is given
+QUERIES = 2000
+
+
+class ListStackFrontier():
+    """The original list based frontier, kept for comparison."""
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        node = self.frontier[-1]
+        self.frontier = self.frontier[:-1]
+        return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python benchmark.py frontier [size ...]\n"
+                 "       python benchmark.py scaling directory "
+                 "[queries file | -] [max workers]")
+    benchmarks = {
+        "frontier": benchmark_frontiers,
+        "scaling": benchmark_scaling,
+    }
+    if sys.argv[1] not in benchmarks:
+        sys.exit(f"Unknown benchmark, choose from: {', '.join(benchmarks)}")
+    benchmarks[sys.argv[1]](sys.argv[2:])
+
+
+def benchmark_frontiers(args):
+    """
+    Times filling and draining each frontier with `size` nodes.
+
+    The list based frontiers copy themselves on every removal, so they
+    are only run on a slice of the nodes and extrapolated linearly
+    (which flatters them, their real cost is quadratic).
+    """
+    sizes = [int(arg) for arg in args] or SIZES
+    frontiers = [
+        ("stack", ListStackFrontier, StackFrontier),
+        ("queue", ListQueueFrontier, QueueFrontier),
+    ]
+    for size in sizes:
+        print(f"{size} nodes")
+        for kind, old, new in frontiers:
+            new_time = time_frontier(new, size, size)
+            sample = min(size, 10 ** 4)
+            old_time = time_frontier(old, size, sample) * size / sample
+            print(f"  {kind}: list {old_time:.3f}s, deque {new_time:.3f}s "
+                  f"({old_time / new_time:.0f}x)")
+        membership = time_membership(StackFrontier, size)
+        print(f"  contains_state x1000: {membership * 1000:.3f}ms")
+
+
+def time_frontier(frontier_class, size, removals):
+    """
+    Adds `size` nodes to a fresh frontier and removes `removals` of them
+
+    Returns the time spent removing
+    """
+    frontier = frontier_class()
+    for i in range(size):
+        frontier.add(Node(i, None, None))
+
+    start = time.perf_counter()
+    for _ in range(removals):
+        frontier.remove()
+    return time.perf_counter() - start
+
+
+def time_membership(frontier_class, size):
+    """
+    Returns the time spent on 1000 contains_state calls on a full
+    frontier.
+    """
+    frontier = frontier_class()
+    for i in range(size):
+        frontier.add(Node(i, None, None))
+
+    start = time.perf_counter()
+    for i in range(1000):
+        frontier.contains_state(size - i)
+    return time.perf_counter() - start
+
+
+def benchmark_scaling(args):
+    """
+    Times the same batch of queries answered by 1 up to N worker processes.
+    """
+    if not args:
+        sys.exit("Usage: python benchmark.py scaling directory "
+                 "[queries file | -] [max workers]")
+    directory = args[0]
+    max_workers = int(args[2]) if len(args) > 2 else os.cpu_count()
+
+    degrees.load_data(directory, compact=True)
+    if len(args) > 1 and args[1] != "-":
+        with open(args[1], encoding="utf-8") as f:
+            lines = f.readlines()
+    else:
+        lines = random_queries(QUERIES)
+
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        # forked workers inherit the cache, start every pass from a cold one
+        degrees.path_cache = PathCache()
+        count, elapsed = service.run_batch(
+            lines, degrees.answer_query, out=io.StringIO(), workers=workers
+        )
+        baseline = baseline or elapsed
+        print(f"{workers} workers: {count / elapsed:.1f} queries/sec "
+              f"({baseline / elapsed:.2f}x)")
+
+
+def random_queries(count):
+    """Returns `count` tab separated lines pairing random unambiguous names."""
+    unique = [name for name, person_ids in degrees.names.items()
+              if len(person_ids) == 1]
+    return [f"{random.choice(unique)}\t{random.choice(unique)}\n"
+            for _ in range(count)]
+
+
+if __name__ == "__main__":
+    main()
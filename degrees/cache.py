@@ -0,0 +1,106 @@
+from collections import OrderedDict
+
+# Number of (source, target) paths remembered
+PATHS = 4096
+
+# Number of search trees remembered, each holds a few arrays per person
+TREES = 4
+
+# Returned by lookup when nothing cached answers the query
+MISSING = object()
+
+
+class PathCache():
+    """
+    Least recently used cache of shortest paths between person indexes.
+
+    Besides (source, target) pairs, it keeps the breadth first search
+    trees of the latest sources: every person a tree reached already has
+    a shortest path back to its source, so a follow-up query from the
+    same source is answered from the tree when it covers the target.
+    """
+
+    def __init__(self, paths=PATHS, trees=TREES):
+        self.max_paths = paths
+        self.max_trees = trees
+        self.paths = OrderedDict()
+        self.trees = OrderedDict()
+        self.hits = 0
+        self.tree_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, source, target):
+        """
+        Returns the cached path from source to target as a list of
+        (movie, person) index pairs, None if they're known not to be
+        connected, or MISSING.
+        """
+        key = (source, target)
+        if key in self.paths:
+            self.paths.move_to_end(key)
+            self.hits += 1
+            return self.paths[key]
+
+        # the same path walked backwards
+        if (target, source) in self.paths:
+            self.hits += 1
+            path = reverse_path(target, self.paths[(target, source)])
+            self.store(source, target, path)
+            return path
+
+        tree = self.trees.get(source)
+        if tree is not None and (tree.reached(target) or tree.exhausted):
+            self.trees.move_to_end(source)
+            self.tree_hits += 1
+            path = tree.path_to(target)
+            self.store(source, target, path)
+            return path
+
+        self.misses += 1
+        return MISSING
+
+    def store(self, source, target, path):
+        self.paths[(source, target)] = path
+        self.paths.move_to_end((source, target))
+        if len(self.paths) > self.max_paths:
+            self.paths.popitem(last=False)
+            self.evictions += 1
+
+    def store_tree(self, tree):
+        """Remembers a search tree, unless it was pruned for one target."""
+        if tree.pruned or self.max_trees == 0:
+            return
+        self.trees[tree.source] = tree
+        self.trees.move_to_end(tree.source)
+        if len(self.trees) > self.max_trees:
+            self.trees.popitem(last=False)
+
+    def stats(self):
+        """Returns the hit and miss counters and the cache sizes."""
+        lookups = self.hits + self.tree_hits + self.misses
+        return {
+            "hits": self.hits,
+            "tree_hits": self.tree_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                (self.hits + self.tree_hits) / lookups if lookups else None
+            ),
+            "evictions": self.evictions,
+            "paths": len(self.paths),
+            "trees": len(self.trees)
+        }
+
+
+def reverse_path(source, path):
+    """
+    Receives a path from source as a list of (movie, person) pairs
+
+    Returns the same path walked from its end back to source
+    """
+    if path is None:
+        return None
+    people = [source] + [person for _, person in path]
+    return [
+        (path[i][0], people[i]) for i in range(len(path) - 1, -1, -1)
+    ]
@@ -1,6 +1,14 @@
+import argparse
 import csv
+import os
 import sys
 
+import landmarks
+import service
+import snapshot
+from cache import PathCache
+from graph import Graph, INFINITY
+from nameindex import EXACT, NameIndex
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,11 +20,51 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer indexed graph, used instead of people and movies when set
+graph = None
 
-def load_data(directory):
+# Directory to load the landmark index of the compact graph from, on first use
+landmark_directory = None
+landmark_index = None
+
+# Search index over names, built the first time it's needed
+name_index = None
+
+# Recent shortest paths and search trees over the compact graph
+path_cache = PathCache()
+
+
+def load_data(directory, compact=False):
     """
     Load data from CSV files into memory.
+
+    If `compact` is set, people and movies are loaded into the compact
+    graph store instead of the people and movies dictionaries, from a
+    binary snapshot of the directory when there is an up to date one.
+    A landmark index built for the directory is loaded on first use.
     """
+    global graph, landmark_directory, landmark_index, name_index, path_cache
+    # forget whatever an earlier call loaded
+    graph = None
+    landmark_directory = None
+    landmark_index = None
+    name_index = None
+    path_cache = PathCache()
+    names.clear()
+    people.clear()
+    movies.clear()
+
+    if compact:
+        landmark_directory = directory
+        graph = snapshot.load(directory)
+        if graph is None:
+            signature = snapshot.csv_signature(directory)
+            graph = Graph.from_csv(directory)
+            snapshot.save(graph, directory, signature)
+        for person_id, name in zip(graph.person_ids, graph.person_names):
+            names.setdefault(name.lower(), set()).add(person_id)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -53,14 +101,64 @@ def load_data(directory):
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two actors."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--batch", metavar="FILE",
+        help="answer tab separated name pairs from FILE ('-' for stdin)"
+    )
+    mode.add_argument(
+        "--serve", metavar="PORT", type=int,
+        help="answer queries over HTTP on localhost"
+    )
+    mode.add_argument(
+        "--histogram", metavar="NAME",
+        help="count how many people are at each distance from NAME"
+    )
+    parser.add_argument(
+        "--workers", metavar="N", type=int, default=1,
+        help="processes answering batch queries (0 for one per core)"
+    )
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count()
+
+    # keep stdout clean for batch results
+    log = sys.stderr if args.batch else sys.stdout
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=log)
+    load_data(args.directory, compact=True)
+    print("Data loaded.", file=log)
+
+    if args.batch:
+        if args.batch == "-":
+            count, elapsed = service.run_batch(
+                sys.stdin, answer_query, workers=workers
+            )
+        else:
+            with open(args.batch, encoding="utf-8") as lines:
+                count, elapsed = service.run_batch(
+                    lines, answer_query, workers=workers
+                )
+        service.report_throughput(count, elapsed)
+        if workers == 1:
+            print(f"Cache: {path_cache.stats()}", file=sys.stderr)
+        return
+    if args.serve is not None:
+        service.serve(answer_query, args.serve, stats=path_cache.stats)
+        return
+    if args.histogram:
+        source = person_id_for_name(args.histogram)
+        if source is None:
+            sys.exit("Person not found.")
+        tree = distances_from(source)
+        for distance, count in enumerate(tree.levels):
+            print(f"{distance} degrees: {count} people")
+        print(f"Not connected: {len(graph) - sum(tree.levels)} people")
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +167,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=True)
 
     if path is None:
         print("Not connected.")
@@ -78,23 +176,82 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_info(path[i][1])["name"]
+            person2 = person_info(path[i + 1][1])["name"]
+            movie = movie_info(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def answer_query(source_name, target_name):
+    """
+    Answers one query without ever prompting.
+
+    Returns a dictionary with the degrees of separation and the path
+    between the two names, or an error when a name is unknown or ambiguous.
+    With a landmark index, the distance bounds it gives for the pair are
+    included too, the lower one None when they aren't connected.
+    """
+    result = {"source": source_name, "target": target_name}
+
+    person_ids = []
+    for name in (source_name, target_name):
+        candidates = person_ids_for_name(name)
+        if len(candidates) == 0:
+            result["error"] = f"person not found: {name}"
+            result["suggestions"] = search_names(name)
+            return result
+        if len(candidates) > 1:
+            result["error"] = f"ambiguous name: {name}"
+            result["candidates"] = describe_people(candidates)
+            return result
+        person_ids.append(candidates[0])
+
+    source, target = person_ids
+    lower, upper = distance_bounds(source, target)
+    if lower is not None:
+        result["bounds"] = {
+            "lower": None if lower == INFINITY else lower, "upper": upper
+        }
+
+    path = shortest_path(source, target, bidirectional=True)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+        return result
+
+    result["degrees"] = len(path)
+    result["path"] = [
+        {
+            "movie_id": movie_id,
+            "movie": movie_info(movie_id)["title"],
+            "person_id": person_id,
+            "person": person_info(person_id)["name"]
+        }
+        for movie_id, person_id in path
+    ]
+    return result
+
+
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is set, searches from both ends at once.
+
     If no possible path, returns None.
     """
 
     if source == target:
         return []
 
+    if graph is not None:
+        return graph.shortest_path(source, target, bidirectional,
+                                   get_landmarks(), path_cache)
+
+    if bidirectional:
+        return bidirectional_search(source, target)
+
     frontier = QueueFrontier()
 
     source_node = Node(source, None, None)
@@ -125,6 +282,127 @@ def shortest_path(source, target):
                 frontier.add(node)
 
 
+def bidirectional_search(source, target):
+    """
+    Runs a breadth first search growing from both the source and the target,
+    always expanding a whole level of the smaller side.
+
+    Returns the path in the same format as generate_path, or None.
+    """
+    # each side maps a reached person to the (movie_id, person_id) step
+    # that reached it, the start of each side maps to None
+    forward = {source: None}
+    backward = {target: None}
+
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(
+                forward_frontier, forward, backward
+            )
+        else:
+            backward_frontier, meeting = expand_level(
+                backward_frontier, backward, forward
+            )
+
+        # the first meeting point is on a shortest path, since both sides
+        # were disjoint until this level
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    return None
+
+
+def expand_level(frontier, reached, other_side):
+    """
+    Expands every person in the frontier, recording new people in `reached`
+
+    Returns the next frontier and the first person also reached
+    by the other side (or None)
+    """
+    next_frontier = []
+
+    for current in frontier:
+        for movie_id, person_id in neighbors_for_person(current):
+            if person_id in reached:
+                continue
+
+            reached[person_id] = (movie_id, current)
+
+            if person_id in other_side:
+                return next_frontier, person_id
+
+            next_frontier.append(person_id)
+
+    return next_frontier, None
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Receives the person where both searches met
+
+    Returns the whole path as a list of (movie_id, person_id) pairs
+    """
+    path = []
+
+    # backtrace from the meeting point to the source
+    person = meeting
+    while forward[person] is not None:
+        movie_id, previous = forward[person]
+        path.append((movie_id, person))
+        person = previous
+    path.reverse()
+
+    # then walk forward from the meeting point to the target
+    person = meeting
+    while backward[person] is not None:
+        movie_id, following = backward[person]
+        path.append((movie_id, following))
+        person = following
+
+    return path
+
+
+def get_landmarks():
+    """
+    Returns the landmark index of the compact graph, loading it the
+    first time, or None if none was built for the loaded directory.
+    """
+    global landmark_directory, landmark_index
+    if landmark_directory is not None:
+        landmark_index = landmarks.load(landmark_directory, len(graph))
+        landmark_directory = None
+    return landmark_index
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between two
+    people from the landmark index, without searching. The lower bound is
+    infinite if they aren't connected, and both are None with no index.
+    """
+    index = get_landmarks()
+    if index is None:
+        return None, None
+    return index.bounds(graph.person_index[source],
+                        graph.person_index[target])
+
+
+def distances_from(person_id, max_depth=None):
+    """
+    Runs one breadth first search from a person over the compact graph,
+    reaching everyone within `max_depth` degrees (or everyone if None).
+
+    Returns the SearchTree, with distance and parent arrays indexed like
+    graph.person_ids and the number of people found at each distance.
+    """
+    if graph is None:
+        raise Exception("distances_from needs load_data(compact=True)")
+    return graph.distances_from(graph.person_index[person_id], max_depth)
+
+
 def generate_path(node):
     """
     Receives the final node of the path
@@ -143,30 +421,91 @@ def generate_path(node):
     return path[::-1]
 
 
+def person_ids_for_name(name):
+    """
+    Returns every IMDB id matching a person's name, without prompting.
+    """
+    return sorted(names.get(name.lower(), set()))
+
+
+def search_names(query, limit=10):
+    """
+    Searches people by name without prompting, allowing prefixes,
+    words in any order and a typo per word.
+
+    Returns up to `limit` dictionaries with the id, name, birth and
+    number of movies of each match, best matches first.
+    """
+    global name_index
+    if name_index is None:
+        if graph is not None:
+            name_index = NameIndex(
+                graph.person_ids, graph.person_names, graph.person_births,
+                [graph.movie_count(person) for person in range(len(graph))]
+            )
+        else:
+            person_ids = list(people)
+            name_index = NameIndex(
+                person_ids,
+                [people[person_id]["name"] for person_id in person_ids],
+                [people[person_id]["birth"] for person_id in person_ids],
+                [len(people[person_id]["movies"]) for person_id in person_ids]
+            )
+    return name_index.search(query, limit)
+
+
+def describe_people(person_ids):
+    """
+    Returns a dictionary like those of search_names for each of the people
+    sharing a name, as exact matches, the ones with most movies first.
+    """
+    matches = []
+    for person_id in person_ids:
+        info = person_info(person_id)
+        if graph is not None:
+            movie_count = graph.movie_count(graph.person_index[person_id])
+        else:
+            movie_count = len(info["movies"])
+        matches.append({
+            "id": person_id,
+            "name": info["name"],
+            "birth": info["birth"],
+            "movies": movie_count,
+            "match": EXACT
+        })
+    matches.sort(key=lambda match: (-match["movies"], match["name"]))
+    return matches
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
+    if len(person_ids) == 1:
+        return person_ids[0]
+
     if len(person_ids) == 0:
-        return None
-    elif len(person_ids) > 1:
-        print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
+        # offer the closest names instead
+        matches = search_names(name)
+        if len(matches) == 0:
+            return None
+        print(f"No '{name}', did you mean:")
     else:
-        return person_ids[0]
+        matches = describe_people(person_ids)
+        print(f"Which '{name}'?")
+
+    for match in matches:
+        print(f"ID: {match['id']}, Name: {match['name']}, "
+              f"Birth: {match['birth']}, Movies: {match['movies']}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in [match["id"] for match in matches]:
+            return person_id
+    except ValueError:
+        pass
+    return None
 
 
 def neighbors_for_person(person_id):
@@ -174,6 +513,9 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -182,5 +524,25 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def person_info(person_id):
+    """
+    Returns a dictionary with at least the name and birth of a person,
+    from whichever store was loaded.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def movie_info(movie_id):
+    """
+    Returns a dictionary with at least the title and year of a movie,
+    from whichever store was loaded.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
+
 if __name__ == "__main__":
     main()
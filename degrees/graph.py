@@ -0,0 +1,498 @@
+import csv
+from array import array
+
+from cache import MISSING
+
+# Typecode for every integer buffer in the graph (32 bit signed ints)
+INDEX_TYPE = "i"
+
+INFINITY = float("inf")
+
+
+class Graph():
+    """
+    Compact actor graph.
+
+    People and movies are interned to consecutive integers, and the
+    person -> movies and movie -> people edges are stored in compressed
+    sparse row form: the neighbors of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the
+    same layout is used for the stars of each movie.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        self.person_index = {
+            person_id: index for index, person_id in enumerate(person_ids)
+        }
+        self.movie_index = {
+            movie_id: index for index, movie_id in enumerate(movie_ids)
+        }
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds the graph straight from the CSV files in `directory`,
+        without ever creating per person or per movie sets.
+        """
+        person_ids, person_names, person_births = [], [], []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        person_index = {pid: i for i, pid in enumerate(person_ids)}
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+
+        # collect each (person, movie) edge once, ignoring unknown ids
+        edge_people = array(INDEX_TYPE)
+        edge_movies = array(INDEX_TYPE)
+        seen = set()
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person = person_index.get(row["person_id"])
+                movie = movie_index.get(row["movie_id"])
+                if person is None or movie is None:
+                    continue
+                edge = person * len(movie_ids) + movie
+                if edge in seen:
+                    continue
+                seen.add(edge)
+                edge_people.append(person)
+                edge_movies.append(movie)
+        del seen
+
+        person_offsets, person_movies = compress(
+            edge_people, edge_movies, len(person_ids)
+        )
+        movie_offsets, movie_people = compress(
+            edge_movies, edge_people, len(movie_ids)
+        )
+
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   person_offsets, person_movies, movie_offsets, movie_people)
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def person(self, person_id):
+        """Returns a dictionary with the name and birth of a person."""
+        index = self.person_index[person_id]
+        return {
+            "name": self.person_names[index],
+            "birth": self.person_births[index]
+        }
+
+    def movie_count(self, person):
+        """Returns the number of movies of a person index."""
+        return self.person_offsets[person + 1] - self.person_offsets[person]
+
+    def movie(self, movie_id):
+        """Returns a dictionary with the title and year of a movie."""
+        index = self.movie_index[movie_id]
+        return {
+            "title": self.movie_titles[index],
+            "year": self.movie_years[index]
+        }
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        person = self.person_index[person_id]
+        return {
+            (self.movie_ids[movie], self.person_ids[costar])
+            for movie, costar in self.neighbors(person)
+        }
+
+    def neighbors(self, person):
+        """Yields (movie, person) index pairs for the co-stars of a person."""
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        start = self.person_offsets[person]
+        end = self.person_offsets[person + 1]
+        for movie in self.person_movies[start:end]:
+            for costar in movie_people[movie_offsets[movie]:
+                                       movie_offsets[movie + 1]]:
+                yield movie, costar
+
+    def shortest_path(self, source, target, bidirectional=False,
+                      landmarks=None, cache=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If a LandmarkIndex is given, its distance bounds are used to answer
+        disconnected pairs right away and to prune the search. If a
+        PathCache is given, it is checked first and kept up to date.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if source == target:
+            return []
+
+        path = MISSING if cache is None else cache.lookup(source, target)
+        if path is MISSING:
+            path = self.find_path(source, target, bidirectional, landmarks,
+                                  cache)
+            if cache is not None:
+                cache.store(source, target, path)
+
+        if path is None:
+            return None
+        return [
+            (self.movie_ids[movie], self.person_ids[person])
+            for movie, person in path
+        ]
+
+    def find_path(self, source, target, bidirectional=False, landmarks=None,
+                  cache=None):
+        """
+        Searches from source to target with the chosen strategy
+
+        Returns the path as a list of (movie, person) index pairs, or None
+        """
+        if landmarks is not None:
+            return self.landmark_search(source, target, bidirectional,
+                                        landmarks, cache)
+        if bidirectional:
+            return self.bidirectional_search(source, target, cache)
+        return self.search(source, target, cache)
+
+    def landmark_search(self, source, target, bidirectional, landmarks,
+                        cache=None):
+        """
+        Searches from source to target using landmark distance bounds
+
+        Returns the path as a list of (movie, person) index pairs, or None
+        """
+        lower, upper = landmarks.bounds(source, target)
+        if lower == INFINITY:
+            return None
+        if bidirectional:
+            return self.bidirectional_search(source, target, cache,
+                                             landmarks, upper)
+        if upper is None:
+            return self.search(source, target, cache)
+
+        # skip anyone who can't be on a path of at most `upper` degrees
+        column = landmarks.column(target)
+
+        def prune(person, depth):
+            return depth + landmarks.lower_bound(person, column) > upper
+
+        tree = self.explore(source, max_depth=upper, target=target,
+                            prune=prune)
+        return tree.path_to(target)
+
+    def search(self, source, target, cache=None):
+        """
+        Breadth first search from source to target over person indexes,
+        handing the search tree to the PathCache if there is one
+
+        Returns the path as a list of (movie, person) index pairs, or None
+        """
+        tree = self.explore(source, target=target)
+        if cache is not None:
+            cache.store_tree(tree)
+        return tree.path_to(target)
+
+    def distances_from(self, source, max_depth=None):
+        """
+        Runs a single breadth first search from source, over everyone
+        within `max_depth` degrees of it (everyone reachable if None).
+
+        Returns the SearchTree with the distance and parent of every
+        person reached, and the number of people at each distance.
+        """
+        return self.explore(source, max_depth=max_depth)
+
+    def explore(self, source, max_depth=None, target=None, prune=None):
+        """
+        Level synchronous breadth first search from source, stopping
+        after `max_depth` levels or as soon as `target` is reached.
+        People for whom `prune(person, depth)` is true are never reached.
+
+        Returns the SearchTree built so far
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        tree = SearchTree(source, len(self))
+        tree.pruned = prune is not None
+        distance = tree.distance
+        parent_person = tree.parent_person
+        parent_movie = tree.parent_movie
+
+        frontier = [source]
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for person in frontier:
+                for movie in person_movies[person_offsets[person]:
+                                           person_offsets[person + 1]]:
+                    for costar in movie_people[movie_offsets[movie]:
+                                               movie_offsets[movie + 1]]:
+                        if distance[costar] != -1:
+                            continue
+                        if prune is not None and prune(costar, depth):
+                            continue
+                        distance[costar] = depth
+                        parent_person[costar] = person
+                        parent_movie[costar] = movie
+                        next_frontier.append(costar)
+                        if costar == target:
+                            tree.levels.append(len(next_frontier))
+                            return tree
+            if next_frontier:
+                tree.levels.append(len(next_frontier))
+            frontier = next_frontier
+
+        tree.exhausted = not frontier
+        return tree
+
+    def bidirectional_search(self, source, target, cache=None,
+                             landmarks=None, upper=None):
+        """
+        Breadth first search growing from both ends, expanding a whole
+        level of the smaller side each time
+
+        Given a LandmarkIndex and the upper bound it found for the pair,
+        the search stops once the depths of the two sides add up to it,
+        and each side skips people whose lower bound to the other end
+        doesn't fit. Unpruned, the side grown from the source is handed to
+        the PathCache if there is one.
+
+        Returns the path as a list of (movie, person) index pairs, or None
+        """
+        # each side maps a reached person to the (movie, person) step
+        # that reached it
+        forward = {source: None}
+        backward = {target: None}
+
+        forward_frontier = [source]
+        backward_frontier = [target]
+        forward_depth = backward_depth = 0
+
+        prune_forward = prune_backward = None
+        if landmarks is not None and upper is not None:
+            source_column = landmarks.column(source)
+            target_column = landmarks.column(target)
+
+            def prune_forward(person, depth):
+                return depth + landmarks.lower_bound(
+                    person, target_column
+                ) > upper
+
+            def prune_backward(person, depth):
+                return depth + landmarks.lower_bound(
+                    person, source_column
+                ) > upper
+
+        meeting = None
+        while forward_frontier and backward_frontier:
+            if upper is not None and forward_depth + backward_depth >= upper:
+                break
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_depth += 1
+                forward_frontier, meeting = self.expand_level(
+                    forward_frontier, forward, backward,
+                    prune_forward, forward_depth
+                )
+            else:
+                backward_depth += 1
+                backward_frontier, meeting = self.expand_level(
+                    backward_frontier, backward, forward,
+                    prune_backward, backward_depth
+                )
+            if meeting is not None:
+                break
+
+        if cache is not None and upper is None:
+            tree = ReachedTree(source, forward)
+            tree.exhausted = meeting is None and not forward_frontier
+            cache.store_tree(tree)
+
+        if meeting is None:
+            return None
+        path = []
+        person = meeting
+        while forward[person] is not None:
+            movie, previous = forward[person]
+            path.append((movie, person))
+            person = previous
+        path.reverse()
+
+        person = meeting
+        while backward[person] is not None:
+            movie, following = backward[person]
+            path.append((movie, following))
+            person = following
+        return path
+
+    def expand_level(self, frontier, reached, other_side, prune=None,
+                     depth=None):
+        """
+        Expands every person in the frontier, recording new people in
+        `reached`. People for whom `prune(person, depth)` is true are
+        skipped.
+
+        Returns the next frontier and the first person also reached
+        by the other side (or None)
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        next_frontier = []
+        for person in frontier:
+            for movie in person_movies[person_offsets[person]:
+                                       person_offsets[person + 1]]:
+                for costar in movie_people[movie_offsets[movie]:
+                                           movie_offsets[movie + 1]]:
+                    if costar in reached:
+                        continue
+                    if prune is not None and prune(costar, depth):
+                        continue
+                    reached[costar] = (movie, person)
+                    if costar in other_side:
+                        return next_frontier, costar
+                    next_frontier.append(costar)
+
+        return next_frontier, None
+
+
+class SearchTree():
+    """
+    Breadth first search tree rooted at `source`.
+
+    `distance[p]` is the degrees of separation between source and person
+    `p` (-1 if not reached), `parent_person[p]` and `parent_movie[p]` are
+    the step that reached it, and `levels[d]` counts the people found at
+    distance `d`. `exhausted` is set once everyone reachable was found.
+
+    A `pruned` tree skipped people off the way to one target, so only
+    the path to that target can be trusted.
+    """
+
+    def __init__(self, source, size):
+        self.source = source
+        self.distance = array(INDEX_TYPE, [-1]) * size
+        self.parent_person = array(INDEX_TYPE, [-1]) * size
+        self.parent_movie = array(INDEX_TYPE, [-1]) * size
+        self.distance[source] = 0
+        self.parent_person[source] = source
+        self.levels = [1]
+        self.exhausted = False
+        self.pruned = False
+
+    def reached(self, person):
+        return self.distance[person] != -1
+
+    def path_to(self, person):
+        """
+        Returns the path from the source to a reached person as a list
+        of (movie, person) index pairs, or None if it wasn't reached
+        """
+        if not self.reached(person):
+            return None
+        return trace(self.parent_person, self.parent_movie,
+                     self.source, person)
+
+
+class ReachedTree():
+    """
+    The side of a bidirectional search grown from `source`, a dictionary
+    mapping every person it reached to the (movie, person) step that
+    reached it (None for the source).
+
+    Levels were expanded whole and in order, so each reached person has
+    a shortest path back to the source, like in a SearchTree.
+    """
+
+    def __init__(self, source, steps):
+        self.source = source
+        self.steps = steps
+        self.exhausted = False
+        self.pruned = False
+
+    def reached(self, person):
+        return person in self.steps
+
+    def path_to(self, person):
+        """
+        Returns the path from the source to a reached person as a list
+        of (movie, person) index pairs, or None if it wasn't reached
+        """
+        if person not in self.steps:
+            return None
+        path = []
+        while self.steps[person] is not None:
+            movie, previous = self.steps[person]
+            path.append((movie, person))
+            person = previous
+        return path[::-1]
+
+
+def compress(rows, columns, row_count):
+    """
+    Receives two parallel arrays of edges (row, column)
+
+    Returns (offsets, values) in compressed sparse row form
+    """
+    offsets = array(INDEX_TYPE, [0]) * (row_count + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for row in range(row_count):
+        offsets[row + 1] += offsets[row]
+
+    # place every column in the next free slot of its row
+    values = array(INDEX_TYPE, [0]) * len(columns)
+    cursor = offsets[:-1]
+    for row, column in zip(rows, columns):
+        values[cursor[row]] = column
+        cursor[row] += 1
+
+    return offsets, values
+
+
+def trace(parent_person, parent_movie, source, target):
+    """
+    Follows the parent arrays back from target to source
+
+    Returns the path as a list of (movie, person) index pairs
+    """
+    path = []
+    person = target
+    while person != source:
+        path.append((parent_movie[person], person))
+        person = parent_person[person]
+    return path[::-1]
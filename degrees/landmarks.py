@@ -0,0 +1,220 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import snapshot
+from graph import Graph, INDEX_TYPE, INFINITY
+
+# An index written with any other version is ignored, searches then run
+# without bounds until `python landmarks.py` builds it again
+LANDMARKS_VERSION = 1
+LANDMARKS_NAME = "degrees.landmarks"
+MAGIC = b"LANDMARK"
+
+# Landmarks picked when building an index
+COUNT = 16
+
+# One byte per person and landmark, this value marks "not connected"
+DISTANCE_TYPE = "B"
+UNREACHABLE = 255
+
+# magic, version, the (mtime, size) of every CSV file, number of people,
+# number of landmarks
+HEADER = struct.Struct(f"<8sI4x{2 * len(snapshot.CSV_FILES)}qqq")
+
+
+class LandmarkIndex():
+    """
+    Distances from a few well connected landmark actors to everyone.
+
+    By the triangle inequality, for any landmark L the distance between
+    two people s and t is at least |d(L, s) - d(L, t)| and at most
+    d(L, s) + d(L, t), and if only one of them is connected to L then
+    they can't be connected to each other.
+    """
+
+    def __init__(self, landmarks, distances):
+        # person indexes of the landmarks
+        self.landmarks = landmarks
+        # for each landmark, the distance to every person
+        self.distances = distances
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def column(self, person):
+        """Returns the distances from every landmark to a person."""
+        return [distance[person] for distance in self.distances]
+
+    def bounds(self, source, target):
+        """
+        Returns the (lower, upper) bounds on the degrees of separation
+        between two people. The lower bound is INFINITY if they can't be
+        connected, and the upper bound is None if no landmark reaches them.
+        """
+        lower, upper = 0, None
+        for distance in self.distances:
+            to_source, to_target = distance[source], distance[target]
+            if to_source == UNREACHABLE and to_target == UNREACHABLE:
+                continue
+            if to_source == UNREACHABLE or to_target == UNREACHABLE:
+                return INFINITY, None
+            lower = max(lower, abs(to_source - to_target))
+            if upper is None or to_source + to_target < upper:
+                upper = to_source + to_target
+        return lower, upper
+
+    def lower_bound(self, person, column):
+        """
+        Returns the lower bound on the distance between a person and the
+        person whose landmark distances are `column`.
+        """
+        lower = 0
+        for distance, other in zip(self.distances, column):
+            here = distance[person]
+            if here == UNREACHABLE and other == UNREACHABLE:
+                continue
+            if here == UNREACHABLE or other == UNREACHABLE:
+                return INFINITY
+            if abs(here - other) > lower:
+                lower = abs(here - other)
+        return lower
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python landmarks.py directory [count]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else COUNT
+
+    # the index belongs to the files as they were before reading them
+    signature = snapshot.csv_signature(directory)
+    graph = snapshot.load(directory)
+    if graph is None:
+        graph = Graph.from_csv(directory)
+        snapshot.save(graph, directory, signature)
+
+    print(f"Building {count} landmarks over {len(graph)} people...")
+    index = build(graph, count)
+    save(index, directory, len(graph), signature)
+    for landmark in index.landmarks:
+        print(f"  {graph.person_names[landmark]} "
+              f"({graph.person_ids[landmark]})")
+
+
+def build(graph, count=COUNT):
+    """
+    Picks up to `count` landmarks among the people with the most co-stars,
+    skipping anyone who co-starred with an earlier pick so they spread
+    over the graph, and runs one breadth first search from each.
+
+    Returns the LandmarkIndex.
+    """
+    movie_sizes = [
+        graph.movie_offsets[movie + 1] - graph.movie_offsets[movie]
+        for movie in range(len(graph.movie_ids))
+    ]
+    costars = [
+        sum(movie_sizes[movie] for movie in graph.person_movies[
+            graph.person_offsets[person]:graph.person_offsets[person + 1]
+        ])
+        for person in range(len(graph))
+    ]
+    candidates = sorted(range(len(graph)), key=costars.__getitem__,
+                        reverse=True)
+
+    landmarks = []
+    distances = []
+    for person in candidates:
+        if len(landmarks) == count or costars[person] == 0:
+            break
+        if any(distance[person] <= 1 for distance in distances):
+            continue
+
+        tree = graph.distances_from(person)
+        if len(tree.levels) > UNREACHABLE:
+            raise Exception("graph too deep for one byte landmark distances")
+        distance = array(DISTANCE_TYPE, [UNREACHABLE]) * len(graph)
+        for other, steps in enumerate(tree.distance):
+            if steps != -1:
+                distance[other] = steps
+
+        landmarks.append(person)
+        distances.append(distance)
+
+    return LandmarkIndex(array(INDEX_TYPE, landmarks), distances)
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, LANDMARKS_NAME)
+
+
+def save(index, directory, people, signature=None):
+    """
+    Writes the landmark index over `people` people next to the CSV files
+    it was built from, marked with their csv_signature from before the
+    graph was read (or from now if not given).
+    """
+    if signature is None:
+        signature = snapshot.csv_signature(directory)
+    header = HEADER.pack(
+        MAGIC, LANDMARKS_VERSION, *signature, people, len(index)
+    )
+    # the index takes a while to build, a failed write must not leave a
+    # truncated one behind for load to reject
+    path = landmarks_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(header)
+        f.write(array(INDEX_TYPE, index.landmarks).tobytes())
+        for distance in index.distances:
+            f.write(distance.tobytes())
+    os.replace(temporary, path)
+
+
+def load(directory, people):
+    """
+    Memory maps the landmark index in the directory.
+
+    Returns the LandmarkIndex, or None if there is none, or it is stale
+    or doesn't cover `people` people.
+    """
+    try:
+        with open(landmarks_path(directory), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapped) < HEADER.size:
+        return None
+    header = HEADER.unpack_from(mapped)
+    magic, version = header[:2]
+    signature = list(header[2:-2])
+    stored_people, count = header[-2:]
+    if (magic != MAGIC or version != LANDMARKS_VERSION
+            or stored_people != people):
+        return None
+    try:
+        if signature != snapshot.csv_signature(directory):
+            return None
+    except OSError:
+        return None
+
+    itemsize = array(INDEX_TYPE).itemsize
+    if len(mapped) != HEADER.size + count * (itemsize + people):
+        return None
+
+    view = memoryview(mapped)
+    offset = HEADER.size + count * itemsize
+    landmarks = view[HEADER.size:offset].cast(INDEX_TYPE)
+    distances = [
+        view[offset + i * people:offset + (i + 1) * people]
+        for i in range(count)
+    ]
+    return LandmarkIndex(landmarks, distances)
+
+
+if __name__ == "__main__":
+    main()
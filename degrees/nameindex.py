@@ -0,0 +1,169 @@
+import unicodedata
+from bisect import bisect_left
+
+# Candidates looked at per kind of match, so short prefixes stay cheap
+MAX_CANDIDATES = 1000
+
+# Kinds of matches, best first
+EXACT, PREFIX, WORDS, FUZZY = "exact", "prefix", "words", "fuzzy"
+MATCH_ORDER = [EXACT, PREFIX, WORDS, FUZZY]
+
+
+class NameIndex():
+    """
+    Search index over the names of every person.
+
+    Full names are kept sorted for exact and prefix lookups, and every
+    word of every name maps to the people whose name contains it. Typos
+    are matched one word at a time, looking up the words within one edit
+    through their single character deletions, which are only indexed the
+    first time a fuzzy search is needed.
+    """
+
+    def __init__(self, person_ids, person_names, person_births, movie_counts):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_counts = movie_counts
+
+        normalized = [normalize(name) for name in person_names]
+        order = sorted(range(len(normalized)), key=normalized.__getitem__)
+        self.sorted_names = [normalized[person] for person in order]
+        self.sorted_people = order
+
+        self.words = {}
+        for person, name in enumerate(normalized):
+            for word in set(name.split()):
+                self.words.setdefault(word, []).append(person)
+
+        # maps a word with one character deleted to the words it came from
+        self.deletions = None
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` people matching the query, best first:
+        exact names, then names starting with the query, then names
+        containing every word of the query, then names within one typo
+        per word. Ties go to the people with the most movies.
+
+        Each result is a dictionary with the id, name, birth, number of
+        movies and kind of match.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        matches = {}
+
+        def collect(people, kind):
+            for person in people:
+                matches.setdefault(person, kind)
+
+        collect(self.prefixed(query, exact=True), EXACT)
+        collect(self.prefixed(query), PREFIX)
+        collect(self.with_words(query.split(), fuzzy=False), WORDS)
+        if len(matches) < limit:
+            collect(self.with_words(query.split(), fuzzy=True), FUZZY)
+
+        ranked = sorted(matches, key=lambda person: (
+            MATCH_ORDER.index(matches[person]),
+            -self.movie_counts[person],
+            self.person_names[person]
+        ))
+        return [self.result(person, matches[person])
+                for person in ranked[:limit]]
+
+    def result(self, person, kind):
+        return {
+            "id": self.person_ids[person],
+            "name": self.person_names[person],
+            "birth": self.person_births[person],
+            "movies": self.movie_counts[person],
+            "match": kind
+        }
+
+    def prefixed(self, query, exact=False):
+        """
+        Yields up to MAX_CANDIDATES people whose normalized name starts
+        with (or is, if `exact`) the normalized query.
+        """
+        position = bisect_left(self.sorted_names, query)
+        end = min(position + MAX_CANDIDATES, len(self.sorted_names))
+        while position < end:
+            name = self.sorted_names[position]
+            if not name.startswith(query) or (exact and name != query):
+                return
+            yield self.sorted_people[position]
+            position += 1
+
+    def with_words(self, words, fuzzy):
+        """
+        Returns up to MAX_CANDIDATES people whose names contain every word,
+        or with `fuzzy`, a word within one edit of every word.
+        """
+        people = None
+        for word in words:
+            if fuzzy:
+                found = set()
+                for similar in self.similar_words(word):
+                    found.update(self.words[similar])
+            else:
+                found = set(self.words.get(word, ()))
+            people = found if people is None else people & found
+            if not people:
+                return []
+        ranked = sorted(people, key=lambda person: -self.movie_counts[person])
+        return ranked[:MAX_CANDIDATES]
+
+    def similar_words(self, word):
+        """Returns the indexed words within one edit of a word."""
+        if self.deletions is None:
+            self.deletions = {}
+            for indexed in self.words:
+                for variant in deletions(indexed):
+                    self.deletions.setdefault(variant, set()).add(indexed)
+
+        candidates = set()
+        if word in self.words:
+            candidates.add(word)
+        candidates.update(self.deletions.get(word, ()))
+        for variant in deletions(word):
+            if variant in self.words:
+                candidates.add(variant)
+            candidates.update(self.deletions.get(variant, ()))
+        return [candidate for candidate in candidates
+                if within_one_edit(word, candidate)]
+
+
+def normalize(name):
+    """Lowercases a name, strips its accents and collapses its spaces."""
+    decomposed = unicodedata.normalize("NFKD", name.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+
+def deletions(word):
+    """Returns every variant of a word with one character deleted."""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def within_one_edit(a, b):
+    """
+    Checks if two words are at most one insertion, deletion,
+    substitution or swap of adjacent characters apart.
+    """
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+
+    # skip the common prefix, the rest must differ by a single edit
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return (a[i + 1:] == b[i + 1:]
+                or (a[i + 2:] == b[i + 2:] and a[i:i + 2] == b[i:i + 2][::-1]))
+    if len(a) > len(b):
+        return a[i + 1:] == b[i:]
+    return a[i:] == b[i + 1:]
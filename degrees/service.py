@@ -0,0 +1,131 @@
+import json
+import multiprocessing
+import sys
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Number of pairs handed to a worker process at a time
+CHUNKSIZE = 16
+
+
+def parse_pairs(lines):
+    """
+    Yields (source name, target name) pairs from tab separated lines,
+    skipping blank lines. Malformed lines are yielded as (line, None).
+    """
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        fields = line.split("\t")
+        if len(fields) != 2:
+            yield line, None
+        else:
+            yield fields[0].strip(), fields[1].strip()
+
+
+def run_batch(lines, answer, out=sys.stdout, workers=1):
+    """
+    Answers every source/target pair in `lines` with `answer`, writing
+    one JSON result per line to `out` as soon as it is ready.
+
+    With more than one worker the pairs are answered by a pool of forked
+    processes, which share the already loaded graph copy-on-write instead
+    of receiving a pickled copy of it. Results keep the input order.
+
+    Returns the number of queries answered and the time it took.
+    """
+    start = time.perf_counter()
+    count = 0
+    pairs = parse_pairs(lines)
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            for result in pool.imap(partial(answer_pair, answer), pairs,
+                                    chunksize=CHUNKSIZE):
+                write_result(out, result)
+                count += 1
+    else:
+        for pair in pairs:
+            write_result(out, answer_pair(answer, pair))
+            count += 1
+    return count, time.perf_counter() - start
+
+
+def answer_pair(answer, pair):
+    """Answers a single pair parsed by parse_pairs."""
+    source, target = pair
+    if target is None:
+        return {"query": source, "error": "expected source<TAB>target"}
+    return answer(source, target)
+
+
+def write_result(out, result):
+    out.write(json.dumps(result) + "\n")
+    out.flush()
+
+
+def report_throughput(count, elapsed, out=sys.stderr):
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"Answered {count} queries in {elapsed:.3f}s "
+          f"({rate:.1f} queries/sec)", file=out)
+
+
+def serve(answer, port, host="127.0.0.1", stats=None):
+    """
+    Serves queries over HTTP until interrupted, keeping the loaded
+    graph resident between requests.
+
+    GET /path?source=NAME&target=NAME answers one query,
+    GET /stats reports how many queries were answered and how fast,
+    along with whatever the `stats` callable returns.
+    """
+    counters = {"queries": 0, "busy": 0.0, "started": time.time()}
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/path":
+                query = parse_qs(url.query)
+                if "source" not in query or "target" not in query:
+                    self.send_json(400, {"error": "source and target needed"})
+                    return
+                start = time.perf_counter()
+                result = answer(query["source"][0], query["target"][0])
+                counters["busy"] += time.perf_counter() - start
+                counters["queries"] += 1
+                self.send_json(200, result)
+            elif url.path == "/stats":
+                self.send_json(200, {
+                    "queries": counters["queries"],
+                    "uptime": time.time() - counters["started"],
+                    "queries_per_second": (
+                        counters["queries"] / counters["busy"]
+                        if counters["busy"] > 0 else None
+                    ),
+                    **(stats() if stats else {})
+                })
+            else:
+                self.send_json(404, {"error": "unknown endpoint"})
+
+        def send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer((host, port), Handler)
+    print(f"Serving on http://{host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
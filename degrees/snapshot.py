@@ -0,0 +1,169 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph, INDEX_TYPE
+
+# Bump whenever the layout below changes, older snapshots are then rebuilt
+SNAPSHOT_VERSION = 1
+SNAPSHOT_NAME = "degrees.snapshot"
+MAGIC = b"DEGREES\0"
+
+CSV_FILES = ["people.csv", "movies.csv", "stars.csv"]
+
+STRING_SECTIONS = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years"
+]
+ARRAY_SECTIONS = [
+    "person_offsets", "person_movies", "movie_offsets", "movie_people"
+]
+
+# magic, version, byte order, item size, then the (mtime, size) of every
+# CSV file, then an (offset, length) pair for every section
+HEADER = struct.Struct(
+    f"<8sIBB2x{2 * len(CSV_FILES)}q"
+    f"{2 * (len(STRING_SECTIONS) + len(ARRAY_SECTIONS))}q"
+)
+
+# Separates the strings of a string section
+SEPARATOR = "\0"
+
+# Sections start at multiples of this many bytes
+ALIGNMENT = 8
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def csv_signature(directory):
+    """
+    Returns the (mtime, size) of every CSV file in the directory,
+    flattened into a list.
+    """
+    signature = []
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        signature.extend([stat.st_mtime_ns, stat.st_size])
+    return signature
+
+
+def save(graph, directory, signature=None):
+    """
+    Writes a snapshot of the graph next to the CSV files it was built from.
+
+    `signature` is the csv_signature taken before the files were parsed,
+    so a file changing during the parse leaves the snapshot stale rather
+    than marks old data as current. It is read now if not given.
+
+    Returns False if the directory isn't writable.
+    """
+    if signature is None:
+        signature = csv_signature(directory)
+
+    sections = []
+    for name in STRING_SECTIONS:
+        sections.append(SEPARATOR.join(getattr(graph, name)).encode("utf-8"))
+    for name in ARRAY_SECTIONS:
+        sections.append(getattr(graph, name).tobytes())
+
+    # lay the sections out one after the other, aligned
+    positions = []
+    offset = HEADER.size
+    for data in sections:
+        offset = align(offset)
+        positions.extend([offset, len(data)])
+        offset += len(data)
+
+    header = HEADER.pack(
+        MAGIC, SNAPSHOT_VERSION, byte_order_flag(),
+        array(INDEX_TYPE).itemsize, *signature, *positions
+    )
+
+    # write to a temporary file first so readers never see a partial snapshot
+    path = snapshot_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(header)
+            for data, offset in zip(sections, positions[::2]):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        return False
+    return True
+
+
+def load(directory):
+    """
+    Memory maps the snapshot in the directory.
+
+    Returns the graph, or None if there is no snapshot, or it is from
+    another version or machine, or the CSV files changed since it was made.
+    """
+    path = snapshot_path(directory)
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapped) < HEADER.size:
+        return None
+    header = HEADER.unpack_from(mapped)
+    magic, version, order, itemsize = header[:4]
+    signature = list(header[4:4 + 2 * len(CSV_FILES)])
+    positions = header[4 + 2 * len(CSV_FILES):]
+
+    if (magic != MAGIC or version != SNAPSHOT_VERSION
+            or order != byte_order_flag()
+            or itemsize != array(INDEX_TYPE).itemsize):
+        return None
+    try:
+        if signature != csv_signature(directory):
+            return None
+    except OSError:
+        return None
+    if any(offset + length > len(mapped)
+           for offset, length in zip(positions[::2], positions[1::2])):
+        return None
+
+    view = memoryview(mapped)
+    sections = [
+        view[offset:offset + length]
+        for offset, length in zip(positions[::2], positions[1::2])
+    ]
+    strings = sections[:len(STRING_SECTIONS)]
+    arrays = [section.cast(INDEX_TYPE)
+              for section in sections[len(STRING_SECTIONS):]]
+
+    person_offsets, _, movie_offsets, _ = arrays
+    person_count = len(person_offsets) - 1
+    movie_count = len(movie_offsets) - 1
+
+    def decode(section, count):
+        """Splits a string section back into its `count` strings."""
+        if count == 0:
+            return []
+        return str(section, "utf-8").split(SEPARATOR)
+
+    counts = [person_count] * 3 + [movie_count] * 3
+    string_tables = [
+        decode(section, count) for section, count in zip(strings, counts)
+    ]
+
+    return Graph(*string_tables, *arrays)
+
+
+def byte_order_flag():
+    return 0 if sys.byteorder == "little" else 1
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
@@ -0,0 +1,115 @@
+import os
+
+import pytest
+
+import snapshot
+from graph import Graph
+
+PEOPLE = """id,name,birth
+102,"Kevin Bacon",1958
+129,"Tom Cruise",1962
+144,"Cary Elwes",1962
+158,"Tom Hanks",1956
+200,"Zoë Kravitz",1988
+"""
+
+MOVIES = """id,title,year
+112384,"Apollo 13",1995
+104257,"A Few Good Men",1992
+93779,"The Princess Bride",1987
+"""
+
+STARS = """person_id,movie_id
+102,104257
+102,112384
+129,104257
+144,93779
+158,112384
+158,112384
+999,93779
+"""
+
+
+@pytest.fixture
+def directory(tmp_path):
+    for name, text in [("people.csv", PEOPLE), ("movies.csv", MOVIES),
+                       ("stars.csv", STARS)]:
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def saved(directory):
+    graph = Graph.from_csv(directory)
+    assert snapshot.save(graph, directory)
+    return graph
+
+
+def test_round_trip(directory, saved):
+    loaded = snapshot.load(directory)
+    assert loaded is not None
+    for name in snapshot.STRING_SECTIONS:
+        assert list(getattr(loaded, name)) == list(getattr(saved, name))
+    for name in snapshot.ARRAY_SECTIONS:
+        assert list(getattr(loaded, name)) == list(getattr(saved, name))
+    assert loaded.person_names[-1] == "Zoë Kravitz"
+
+
+def test_empty_graph_round_trip(tmp_path):
+    for name, header in [("people.csv", "id,name,birth\n"),
+                         ("movies.csv", "id,title,year\n"),
+                         ("stars.csv", "person_id,movie_id\n")]:
+        (tmp_path / name).write_text(header, encoding="utf-8")
+    assert snapshot.save(Graph.from_csv(tmp_path), tmp_path)
+    loaded = snapshot.load(tmp_path)
+    assert loaded is not None
+    assert loaded.person_names == [] and list(loaded.person_offsets) == [0]
+
+
+def test_missing_snapshot(directory):
+    assert snapshot.load(directory) is None
+
+
+def test_csv_mtime_changed(directory, saved):
+    stat = os.stat(directory / "stars.csv")
+    os.utime(directory / "stars.csv",
+             ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert snapshot.load(directory) is None
+
+
+def test_csv_size_changed(directory, saved):
+    path = directory / "people.csv"
+    stat = os.stat(path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('300,"Someone Else",1970\n')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert snapshot.load(directory) is None
+
+
+def test_csv_changed_while_parsing(directory):
+    signature = snapshot.csv_signature(directory)
+    graph = Graph.from_csv(directory)
+    with open(directory / "stars.csv", "a", encoding="utf-8") as f:
+        f.write("144,104257\n")
+    assert snapshot.save(graph, directory, signature)
+    assert snapshot.load(directory) is None
+
+
+def test_other_version(directory, saved, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_VERSION",
+                        snapshot.SNAPSHOT_VERSION + 1)
+    assert snapshot.load(directory) is None
+
+
+def test_other_byte_order(directory, saved, monkeypatch):
+    other = 1 - snapshot.byte_order_flag()
+    monkeypatch.setattr(snapshot, "byte_order_flag", lambda: other)
+    assert snapshot.load(directory) is None
+
+
+@pytest.mark.parametrize("keep", [0, snapshot.HEADER.size - 1, -1])
+def test_truncated_snapshot(directory, saved, keep):
+    path = snapshot.snapshot_path(directory)
+    size = os.path.getsize(path)
+    os.truncate(path, keep if keep >= 0 else size + keep)
+    assert snapshot.load(directory) is None
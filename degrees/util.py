@@ -1,3 +1,6 @@
+from collections import Counter, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +10,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # counts how many nodes in the frontier hold each state
+        self.states = Counter()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] += 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return self.states[state] > 0
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,17 +28,21 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.pop()
+            self.forget(node.state)
             return node
 
+    def pop(self):
+        return self.frontier.pop()
+
+    def forget(self, state):
+        """Drops one occurrence of state from the membership counts."""
+        self.states[state] -= 1
+        if self.states[state] == 0:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+    def pop(self):
+        return self.frontier.popleft()
@@ -0,0 +1,370 @@
+import hashlib
+import os
+import pickle
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Bump whenever the cached file layout changes, older files are then rebuilt
+BDD_VERSION = 1
+
+# Directory compiled diagrams are cached in, by structural hash
+CACHE_DIRECTORY = ".bddcache"
+
+# The two terminal nodes
+FALSE, TRUE = 0, 1
+
+
+class BDD():
+    """
+    Reduced ordered binary decision diagrams over a shared node table.
+
+    Node `n` tests the variable at `level[n]` and goes to `low[n]` if it is
+    false, `high[n]` if true, down to the FALSE and TRUE terminals. Nodes
+    are unique per (level, low, high) and never test a variable to no
+    effect, so equal functions are the same node: checking entailment or
+    consistency compares a combined diagram with a terminal, and models
+    are counted in one pass over the nodes.
+
+    Variables are ordered as they are declared. compile() declares the
+    symbols of a sentence in depth first order of first appearance, which
+    keeps symbols used together close in the order.
+    """
+
+    def __init__(self, order=()):
+        self.order = []
+        self.position = {}
+        self.level = [float("inf"), float("inf")]
+        self.low = [FALSE, TRUE]
+        self.high = [FALSE, TRUE]
+        self.unique = {}
+        self.computed = {}
+        self.compiled = {}
+        for name in order:
+            self.declare(name)
+
+    def declare(self, name):
+        """Returns the level of a variable, adding it last if new."""
+        if name not in self.position:
+            self.position[name] = len(self.order)
+            self.order.append(name)
+        return self.position[name]
+
+    def node(self, level, low, high):
+        """Returns the node testing `level`, reduced and unique."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.level)
+            self.level.append(level)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = node
+        return node
+
+    def variable(self, name):
+        return self.node(self.declare(name), FALSE, TRUE)
+
+    def ite(self, f, g, h):
+        """
+        Returns the node of "if f then g else h".
+
+        Each step goes one variable down, so the cofactors are combined
+        from an explicit stack rather than recursing once per variable.
+        """
+        # most calls are answered without going down at all
+        if f == TRUE or g == h:
+            return g
+        if f == FALSE:
+            return h
+        if g == TRUE and h == FALSE:
+            return f
+        computed = self.computed
+        result = computed.get((f, g, h))
+        if result is not None:
+            return result
+
+        level = self.level
+        results = []
+        # (f, g, h) calls, and (key, level) to combine the last two results
+        stack = [(f, g, h)]
+        while stack:
+            frame = stack.pop()
+            if len(frame) == 2:
+                key, top = frame
+                high = results.pop()
+                low = results.pop()
+                result = self.node(top, low, high)
+                computed[key] = result
+                results.append(result)
+                continue
+
+            f, g, h = frame
+            if f == TRUE or g == h:
+                results.append(g)
+            elif f == FALSE:
+                results.append(h)
+            elif g == TRUE and h == FALSE:
+                results.append(f)
+            elif frame in computed:
+                results.append(computed[frame])
+            else:
+                top = min(level[f], level[g], level[h])
+                f_low, f_high = self.cofactors(f, top)
+                g_low, g_high = self.cofactors(g, top)
+                h_low, h_high = self.cofactors(h, top)
+                stack.append((frame, top))
+                stack.append((f_high, g_high, h_high))
+                stack.append((f_low, g_low, h_low))
+        return results[0]
+
+    def cofactors(self, f, level):
+        """Returns f with the variable at `level` false, then true."""
+        if self.level[f] == level:
+            return self.low[f], self.high[f]
+        return f, f
+
+    def negate(self, f):
+        return self.ite(f, FALSE, TRUE)
+
+    def compile(self, sentence):
+        """
+        Returns the node of a sentence, declaring its new symbols first.
+        """
+        for name in ordering(sentence):
+            self.declare(name)
+        return self.build(sentence)
+
+    def build(self, sentence):
+        """
+        Returns the node of a sentence, equal subformulas built once,
+        parts before the sentences made of them.
+        """
+        compiled = self.compiled
+        stack = [(sentence, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in compiled:
+                continue
+            if isinstance(node, Symbol):
+                compiled[node] = self.variable(node.name)
+            elif expanded:
+                compiled[node] = self.combine(
+                    node, [compiled[part] for part in parts(node)]
+                )
+            else:
+                stack.append((node, True))
+                try:
+                    stack.extend((part, False) for part in parts(node))
+                except TypeError:
+                    raise TypeError(f"cannot compile {node!r}") from None
+        return compiled[sentence]
+
+    def combine(self, sentence, nodes):
+        """Returns the node of a compound sentence from those of its parts."""
+        if isinstance(sentence, Not):
+            return self.negate(nodes[0])
+        if isinstance(sentence, And):
+            node = TRUE
+            for conjunct in nodes:
+                node = self.ite(node, conjunct, FALSE)
+            return node
+        if isinstance(sentence, Or):
+            node = FALSE
+            for disjunct in nodes:
+                node = self.ite(node, TRUE, disjunct)
+            return node
+        if isinstance(sentence, Implication):
+            antecedent, consequent = nodes
+            return self.ite(antecedent, consequent, TRUE)
+        left, right = nodes
+        return self.ite(left, right, self.negate(right))
+
+    def entails(self, f, g):
+        """Checks if every model of f is a model of g."""
+        return self.ite(f, g, TRUE) == TRUE
+
+    def consistent(self, f, g):
+        """Checks if f and g have a model in common."""
+        return self.ite(f, g, FALSE) != FALSE
+
+    def count(self, f):
+        """Returns the number of models of f over every declared variable."""
+        variables = len(self.order)
+        counts = {FALSE: 0, TRUE: 1}
+
+        def level(node):
+            return min(self.level[node], variables)
+
+        # children before parents, without recursing down long paths
+        for node in self.nodes(f):
+            if node in counts:
+                continue
+            low = self.low[node]
+            high = self.high[node]
+            counts[node] = (
+                counts[low] << (level(low) - self.level[node] - 1)
+            ) + (
+                counts[high] << (level(high) - self.level[node] - 1)
+            )
+        return counts[f] << level(f)
+
+    def nodes(self, f):
+        """Returns the nodes reachable from f, children before parents."""
+        order = []
+        visited = set()
+        stack = [(f, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                order.append(node)
+                continue
+            if node in visited:
+                continue
+            visited.add(node)
+            stack.append((node, True))
+            if node > TRUE:
+                stack.append((self.high[node], False))
+                stack.append((self.low[node], False))
+        return order
+
+    def size(self, f):
+        """Returns the number of nodes reachable from f, terminals included."""
+        return len(self.nodes(f))
+
+    def save(self, f, path):
+        """Writes the diagram of f and the variable order to a file."""
+        nodes = [node for node in self.nodes(f) if node > TRUE]
+        index = {FALSE: FALSE, TRUE: TRUE}
+        for i, node in enumerate(nodes):
+            index[node] = i + 2
+        state = {
+            "version": BDD_VERSION,
+            "order": self.order,
+            "nodes": [
+                (self.level[node], index[self.low[node]],
+                 index[self.high[node]])
+                for node in nodes
+            ],
+            "root": index[f],
+        }
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a diagram written by save into a new BDD.
+
+        Returns the BDD and the node of the diagram, or None if there is
+        no such file or it is from another version.
+        """
+        try:
+            with open(path, "rb") as file:
+                state = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if state.get("version") != BDD_VERSION:
+            return None
+
+        bdd = cls(state["order"])
+        index = [FALSE, TRUE]
+        for level, low, high in state["nodes"]:
+            index.append(bdd.node(level, index[low], index[high]))
+        return bdd, index[state["root"]]
+
+
+def ordering(sentence):
+    """Returns the symbols of a sentence in depth first order of appearance."""
+    names = {}
+    visited = set()
+    stack = [sentence]
+    while stack:
+        sentence = stack.pop()
+        if id(sentence) in visited:
+            continue
+        visited.add(id(sentence))
+        if isinstance(sentence, Symbol):
+            names.setdefault(sentence.name)
+        else:
+            stack.extend(reversed(parts(sentence)))
+    return list(names)
+
+
+def kind(sentence):
+    """Returns the name of the kind of a compound sentence."""
+    for cls in (Not, And, Or, Implication, Biconditional):
+        if isinstance(sentence, cls):
+            return cls.__name__.lower()
+    raise TypeError(f"not a logical sentence: {sentence!r}")
+
+
+def parts(sentence):
+    """Returns the sentences a compound sentence is made of."""
+    if isinstance(sentence, Not):
+        return [sentence.operand]
+    if isinstance(sentence, And):
+        return list(sentence.conjuncts)
+    if isinstance(sentence, Or):
+        return list(sentence.disjuncts)
+    if isinstance(sentence, Implication):
+        return [sentence.antecedent, sentence.consequent]
+    if isinstance(sentence, Biconditional):
+        return [sentence.left, sentence.right]
+    raise TypeError(f"not a logical sentence: {sentence!r}")
+
+
+def structural_hash(sentence):
+    """
+    Returns a hex digest of the structure of a sentence, the same across
+    runs and machines (unlike hash), each node hashing its kind and the
+    digests of its parts.
+    """
+    digests = {}
+    stack = [(sentence, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in digests:
+            continue
+        if isinstance(node, Symbol):
+            data = b"symbol\0" + node.name.encode("utf-8")
+        elif expanded:
+            data = kind(node).encode("ascii")
+            for part in parts(node):
+                data += b"\0" + digests[id(part)]
+        else:
+            stack.append((node, True))
+            stack.extend((part, False) for part in parts(node))
+            continue
+        digests[id(node)] = hashlib.sha256(data).digest()
+    return digests[id(sentence)].hex()
+
+
+def compile_cached(sentence, directory=CACHE_DIRECTORY):
+    """
+    Returns a BDD and the node of the sentence, read from the cache in
+    `directory` if the sentence was compiled before, or compiled and then
+    written to the cache.
+    """
+    path = os.path.join(directory, f"{structural_hash(sentence)}.bdd")
+    loaded = BDD.load(path)
+    if loaded is not None:
+        return loaded
+
+    bdd = BDD()
+    node = bdd.compile(sentence)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        bdd.save(node, path)
+    except OSError:
+        pass
+    return bdd, node
+
+
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query, comparing their diagrams."""
+    bdd = BDD()
+    return bdd.entails(bdd.compile(knowledge), bdd.compile(query))
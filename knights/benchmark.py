@@ -0,0 +1,142 @@
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import generator
+from entailment import ENGINES, entailments
+from logic import model_check
+
+SIZES = [2, 4, 6, 8, 16, 32, 64]
+
+# Most symbols each engine is run on, a few seconds' worth per puzzle
+LIMITS = {
+    "model_check": 12,
+    "enumerate": 16,
+    "truthtable": 24,
+    "bdd": 800,
+    "sat": 4000,
+}
+
+
+def main():
+    engines = ["model_check"] + list(ENGINES)
+    parser = argparse.ArgumentParser(
+        description="Time entailment engines on random knights and knaves "
+                    "puzzles."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="numbers of characters")
+    parser.add_argument("--engines", nargs="+", choices=engines,
+                        default=engines)
+    parser.add_argument("--statements", type=int,
+                        default=generator.STATEMENTS,
+                        help="statements each character makes, at most")
+    parser.add_argument("--depth", type=int, default=generator.DEPTH,
+                        help="how deeply statements nest")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="FILE",
+                        help="store each puzzle's engine timings in FILE, "
+                             "as JSON, rather than print them")
+    args = parser.parse_args()
+
+    results = {
+        "statements": args.statements,
+        "depth": args.depth,
+        "seed": args.seed,
+        "runs": [],
+    }
+    for size in args.sizes:
+        knowledge, queries, solution = generator.generate(
+            size, args.statements, args.depth, rng=random.Random(args.seed)
+        )
+        run = benchmark_puzzle(knowledge, queries, solution, args.engines)
+        run["characters"] = size
+        results["runs"].append(run)
+        print(f"{size} characters done", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+def benchmark_puzzle(knowledge, queries, solution, engines):
+    """
+    Asks every engine which queries the knowledge base entails, skipping
+    engines past their LIMITS. An engine that fails is recorded with its
+    error instead of ending the whole run.
+
+    Returns a dictionary with the seconds and peak memory of each engine
+    (None if skipped, an error if it failed), whether the engines that
+    answered agree, whether their answers fit the drawn solution, and how
+    many roles they determined (a puzzle can leave some roles open).
+    """
+    symbols = len(knowledge.symbols())
+    timings = {}
+    answers = {}
+    for engine in engines:
+        if symbols > LIMITS[engine]:
+            timings[engine] = None
+            continue
+        try:
+            answers[engine], timings[engine] = measure(
+                solve, knowledge, queries, engine
+            )
+        except Exception as error:
+            timings[engine] = {"error": f"{type(error).__name__}: {error}"}
+
+    distinct = {tuple(answer) for answer in answers.values()}
+    correct = determined = None
+    if answers:
+        # every entailed role must be the drawn one
+        answer = next(iter(answers.values()))
+        correct = all(solution[query.name]
+                      for query, entailed in zip(queries, answer) if entailed)
+        determined = sum(answer)
+    return {
+        "symbols": symbols,
+        "engines": timings,
+        "agree": len(distinct) <= 1,
+        "correct": correct,
+        "roles_determined": determined,
+        "roles": len(queries) // 2,
+    }
+
+
+def solve(knowledge, queries, engine):
+    """Returns which queries the knowledge base entails, with an engine."""
+    if engine == "model_check":
+        return [model_check(knowledge, query) for query in queries]
+    results, _ = entailments(knowledge, queries, engine)
+    return [result["entailed"] for result in results]
+
+
+def measure(function, *args):
+    """
+    Solves the puzzle with one engine twice, the first run for its time
+    and the second under tracemalloc for the memory the engine peaks at,
+    as tracing would inflate the timing.
+
+    Returns the answers of the first run, and its seconds and peak bytes.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, {"seconds": seconds, "peak_bytes": peak}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import itertools
+import time
+
+from bdd import BDD
+from sat import Encoder
+from truthtable import TruthTable
+
+
+def entailments(knowledge, queries, engine="truthtable"):
+    """
+    Checks which of the queries the knowledge base entails, doing the work
+    on the knowledge base once for all of them with one of the ENGINES.
+
+    Returns a list of {"query", "entailed", "seconds"} dictionaries in the
+    order of the queries, where seconds is the time spent on that query
+    alone, and the seconds spent on the shared work.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, "
+                         f"expected one of {', '.join(ENGINES)}")
+    queries = list(queries)
+    start = time.perf_counter()
+    entailed, seconds = ENGINES[engine](knowledge, queries)
+    shared = time.perf_counter() - start - sum(seconds)
+
+    results = [
+        {"query": query, "entailed": answer, "seconds": spent}
+        for query, answer, spent in zip(queries, entailed, seconds)
+    ]
+    return results, shared
+
+
+def enumerate_models(knowledge, queries):
+    """
+    Lists the models of the knowledge base once, then checks each query
+    in every one of them.
+    """
+    symbols = sorted(set.union(
+        knowledge.symbols(), *(query.symbols() for query in queries)
+    ))
+    models = []
+    for values in itertools.product([True, False], repeat=len(symbols)):
+        model = dict(zip(symbols, values))
+        if knowledge.evaluate(model):
+            models.append(model)
+
+    entailed = []
+    seconds = []
+    for query in queries:
+        start = time.perf_counter()
+        entailed.append(all(query.evaluate(model) for model in models))
+        seconds.append(time.perf_counter() - start)
+    return entailed, seconds
+
+
+def compare_tables(knowledge, queries):
+    """
+    Compiles the knowledge base and the queries into one program, and
+    compares every query with the knowledge base on each chunk of models
+    it computes, until each query has a counterexample or models run out.
+    """
+    table = TruthTable([knowledge] + queries)
+    knowledge_register = table.outputs[0]
+    query_registers = table.outputs[1:]
+    mask = table.mask
+
+    entailed = [True] * len(queries)
+    seconds = [0.0] * len(queries)
+    pending = list(range(len(queries)))
+    for chunk in range(table.chunks()):
+        if not pending:
+            break
+        values = table.evaluate(chunk)
+        models = values[knowledge_register]
+        still_pending = []
+        for i in pending:
+            start = time.perf_counter()
+            if models & (values[query_registers[i]] ^ mask):
+                entailed[i] = False
+            else:
+                still_pending.append(i)
+            seconds[i] += time.perf_counter() - start
+        pending = still_pending
+    return entailed, seconds
+
+
+def solve_sat(knowledge, queries):
+    """
+    Encodes the knowledge base into clauses once, then refutes each
+    negated query under an assumption, keeping the clauses learnt.
+    """
+    encoder = Encoder()
+    encoder.add(knowledge)
+
+    entailed = []
+    seconds = []
+    for query in queries:
+        start = time.perf_counter()
+        entailed.append(encoder.entails(query))
+        seconds.append(time.perf_counter() - start)
+    return entailed, seconds
+
+
+def compare_diagrams(knowledge, queries):
+    """
+    Compiles the knowledge base into a decision diagram once, then
+    compiles each query into the same diagram and compares them.
+    """
+    bdd = BDD()
+    compiled = bdd.compile(knowledge)
+
+    entailed = []
+    seconds = []
+    for query in queries:
+        start = time.perf_counter()
+        entailed.append(bdd.entails(compiled, bdd.compile(query)))
+        seconds.append(time.perf_counter() - start)
+    return entailed, seconds
+
+
+# Engines selectable by name
+ENGINES = {
+    "enumerate": enumerate_models,
+    "truthtable": compare_tables,
+    "sat": solve_sat,
+    "bdd": compare_diagrams,
+}
@@ -0,0 +1,83 @@
+import random
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Statements each character makes, at most
+STATEMENTS = 2
+
+# How deeply statements nest connectives
+DEPTH = 2
+
+# Characters only talk about characters this close to them in line, like
+# neighbours in a village, which keeps the puzzles from being all noise
+REACH = 3
+
+
+def generate(characters, statements=STATEMENTS, depth=DEPTH, reach=REACH,
+             rng=random):
+    """
+    Builds a random knights and knaves puzzle with `characters` characters,
+    each a knight (always telling the truth) or a knave (always lying).
+
+    Every character makes up to `statements` statements about itself and
+    the characters within `reach` of it, nested up to `depth` connectives
+    deep. Roles are drawn first and a statement is negated when its
+    speaker couldn't say it, so the puzzle always has a solution.
+
+    Returns the knowledge base, the list of knight and knave symbols to
+    query, and the drawn solution as a dictionary of symbol names.
+    """
+    names = [character_name(i) for i in range(characters)]
+    knights = [Symbol(f"{name} is a Knight") for name in names]
+    knaves = [Symbol(f"{name} is a Knave") for name in names]
+    solution = {}
+    for knight, knave in zip(knights, knaves):
+        is_knight = rng.random() < 0.5
+        solution[knight.name] = is_knight
+        solution[knave.name] = not is_knight
+
+    # each character is a knight or a knave, but not both
+    knowledge = And()
+    for knight, knave in zip(knights, knaves):
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+
+    for speaker in range(characters):
+        nearby = range(max(0, speaker - reach),
+                       min(characters, speaker + reach + 1))
+        claims = [knights[i] for i in nearby] + [knaves[i] for i in nearby]
+        for _ in range(rng.randint(1, statements)):
+            statement = random_statement(claims, depth, rng)
+            if statement.evaluate(solution) != solution[knights[speaker].name]:
+                statement = Not(statement)
+            knowledge.add(Implication(knights[speaker], statement))
+            knowledge.add(Implication(knaves[speaker], Not(statement)))
+
+    queries = [symbol for pair in zip(knights, knaves) for symbol in pair]
+    return knowledge, queries, solution
+
+
+def random_statement(claims, depth, rng):
+    """Returns a random sentence over the claims, nested up to `depth`."""
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(claims)
+    kind = rng.choice([Not, And, Or, Implication, Biconditional])
+    if kind is Not:
+        return Not(random_statement(claims, depth - 1, rng))
+    if kind in (And, Or):
+        return kind(*[
+            random_statement(claims, depth - 1, rng)
+            for _ in range(rng.randint(2, 3))
+        ])
+    return kind(random_statement(claims, depth - 1, rng),
+                random_statement(claims, depth - 1, rng))
+
+
+def character_name(i):
+    """Returns A to Z, then AA, AB and so on."""
+    name = ""
+    i += 1
+    while i:
+        i, letter = divmod(i - 1, 26)
+        name = chr(ord("A") + letter) + name
+    return name
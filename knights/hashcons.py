@@ -0,0 +1,171 @@
+from weakref import WeakValueDictionary
+
+import logic
+from logic import Sentence, model_check
+
+# Every live shared sentence, by its kind and the identities of its parts
+table = WeakValueDictionary()
+
+# Cached per sentence besides the fields of the logic classes
+SLOTS = ("_hash", "_symbols", "__weakref__")
+
+
+class Shared():
+    """
+    Immutable, hash-consed version of the logic sentences.
+
+    Building a sentence equal to a live one returns that same object, so
+    equal subformulas are stored once and compare by identity. The hash
+    (the same as the logic classes') and the set of symbols are computed
+    once from the parts, which are shared themselves. These classes can be
+    used in place of the logic ones, `from hashcons import *` instead of
+    `from logic import *`, and share() converts any existing sentence.
+    Conjuncts and disjuncts are kept as tuples, and no attribute can be
+    set once a sentence is built, since a changed sentence would no longer
+    match its entry in the table.
+    """
+    __slots__ = ()
+
+    def __init__(self, *parts):
+        pass
+
+    def __eq__(self, other):
+        if isinstance(other, Shared):
+            return self is other
+        if not isinstance(other, Sentence):
+            return NotImplemented
+        # an equal logic sentence shares into this very object
+        return share(other) is self
+
+    def __setattr__(self, name, value):
+        raise TypeError("shared sentences can't be changed")
+
+    def __delattr__(self, name):
+        raise TypeError("shared sentences can't be changed")
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self.parts())
+
+    def symbols(self):
+        # a copy, callers may combine it with set.union or change it
+        return set(self._symbols)
+
+
+def make(cls, base, parts, key):
+    """Returns the live sentence for the key, or builds it from its parts."""
+    sentence = table.get(key)
+    if sentence is None:
+        sentence = object.__new__(cls)
+        # the fields of the logic class, And and Or holding all the parts
+        if base is logic.And or base is logic.Or:
+            values = [parts]
+        else:
+            values = parts
+        for field, value in zip(base.__slots__, values):
+            object.__setattr__(sentence, field, value)
+
+        object.__setattr__(sentence, "_hash", base.__hash__(sentence))
+        if base is logic.Symbol:
+            symbols = frozenset([sentence.name])
+        else:
+            symbols = frozenset().union(*(part._symbols for part in parts))
+        object.__setattr__(sentence, "_symbols", symbols)
+        table[key] = sentence
+    return sentence
+
+
+def identities(parts):
+    """Returns the shared parts and their identities, for a table key."""
+    parts = tuple(share(part) for part in parts)
+    return parts, tuple(map(id, parts))
+
+
+class Symbol(Shared, logic.Symbol):
+    __slots__ = SLOTS
+
+    def __new__(cls, name):
+        return make(cls, logic.Symbol, (name,), ("symbol", name))
+
+    def parts(self):
+        return (self.name,)
+
+
+class Not(Shared, logic.Not):
+    __slots__ = SLOTS
+
+    def __new__(cls, operand):
+        parts, key = identities([operand])
+        return make(cls, logic.Not, parts, ("not",) + key)
+
+    def parts(self):
+        return (self.operand,)
+
+
+class And(Shared, logic.And):
+    __slots__ = SLOTS
+
+    def __new__(cls, *conjuncts):
+        parts, key = identities(conjuncts)
+        return make(cls, logic.And, parts, ("and",) + key)
+
+    def add(self, conjunct):
+        raise TypeError("shared sentences can't be changed")
+
+    def parts(self):
+        return self.conjuncts
+
+
+class Or(Shared, logic.Or):
+    __slots__ = SLOTS
+
+    def __new__(cls, *disjuncts):
+        parts, key = identities(disjuncts)
+        return make(cls, logic.Or, parts, ("or",) + key)
+
+    def parts(self):
+        return self.disjuncts
+
+
+class Implication(Shared, logic.Implication):
+    __slots__ = SLOTS
+
+    def __new__(cls, antecedent, consequent):
+        parts, key = identities([antecedent, consequent])
+        return make(cls, logic.Implication, parts, ("implies",) + key)
+
+    def parts(self):
+        return (self.antecedent, self.consequent)
+
+
+class Biconditional(Shared, logic.Biconditional):
+    __slots__ = SLOTS
+
+    def __new__(cls, left, right):
+        parts, key = identities([left, right])
+        return make(cls, logic.Biconditional, parts, ("biconditional",) + key)
+
+    def parts(self):
+        return (self.left, self.right)
+
+
+def share(sentence):
+    """Returns the shared sentence equal to any logic sentence."""
+    if isinstance(sentence, Shared):
+        return sentence
+    Sentence.validate(sentence)
+    if isinstance(sentence, logic.Symbol):
+        return Symbol(sentence.name)
+    if isinstance(sentence, logic.Not):
+        return Not(sentence.operand)
+    if isinstance(sentence, logic.And):
+        return And(*sentence.conjuncts)
+    if isinstance(sentence, logic.Or):
+        return Or(*sentence.disjuncts)
+    if isinstance(sentence, logic.Implication):
+        return Implication(sentence.antecedent, sentence.consequent)
+    if isinstance(sentence, logic.Biconditional):
+        return Biconditional(sentence.left, sentence.right)
+    raise TypeError(f"cannot share {sentence!r}")
@@ -1,4 +1,5 @@
-from logic import *
+from hashcons import *
+from entailment import entailments
 
 AKnight = Symbol("A is a Knight")
 AKnave = Symbol("A is a Knave")
@@ -94,9 +95,10 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
-                    print(f"    {symbol}")
+            results, _ = entailments(knowledge, symbols)
+            for result in results:
+                if result["entailed"]:
+                    print(f"    {result['query']}")
 
 
 if __name__ == "__main__":
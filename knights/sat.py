@@ -0,0 +1,437 @@
+from heapq import heappop, heappush
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Conflicts before the first restart, later restarts follow the Luby sequence
+RESTART_BASE = 100
+
+# Variable activities decay by this factor after every conflict
+DECAY = 0.95
+
+
+class Solver():
+    """
+    Conflict driven clause learning SAT solver.
+
+    Variables are numbered from 1 and literals are signed variable numbers,
+    -v standing for the negation of v. Each clause watches its first two
+    literals, so an assignment only visits the clauses watching the literal
+    it falsified. Conflicts are analysed back to the first unique implication
+    point, and the learnt clause makes the search jump back past every
+    decision that played no part in the conflict. Decisions pick the most
+    active variable with its last value, and the search restarts from
+    scratch on a Luby schedule, keeping what it learnt.
+
+    Clauses can be added between calls to solve, and each call can assume
+    some literals true, so one knowledge base answers many queries.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.watches = {}
+        self.unsatisfiable = False
+
+        # per variable, index 0 unused: 1 true, -1 false, 0 unassigned
+        self.assigns = [0]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.seen = [False]
+        self.heap = []
+        self.increment = 1.0
+
+        # assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+
+        self.conflicts = 0
+        self.decisions = 0
+
+    def new_variable(self):
+        variable = len(self.assigns)
+        self.assigns.append(0)
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        self.seen.append(False)
+        self.watches[variable] = []
+        self.watches[-variable] = []
+        heappush(self.heap, (0.0, variable))
+        return variable
+
+    def value(self, literal):
+        """Returns 1 if the literal is true, -1 if false, 0 if unassigned."""
+        value = self.assigns[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, a disjunction of literals.
+
+        Returns False if the clauses became unsatisfiable.
+        """
+        if self.unsatisfiable:
+            return False
+        self.backtrack(0)
+
+        clause = []
+        for literal in dict.fromkeys(literals):
+            value = self.value(literal)
+            if value == 1 or -literal in clause:
+                return True
+            if value == 0:
+                clause.append(literal)
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.attach(clause)
+        return not self.unsatisfiable
+
+    def attach(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def solve(self, assumptions=()):
+        """
+        Searches for an assignment satisfying every clause with the
+        assumed literals true.
+
+        Returns True if there is one, which model() then describes.
+        """
+        if self.unsatisfiable:
+            return False
+        self.backtrack(0)
+
+        restarts = 0
+        budget = RESTART_BASE * luby(restarts)
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_lim:
+                    self.unsatisfiable = True
+                    return False
+
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.enqueue(learnt[0], self.attach(learnt))
+                self.increment /= DECAY
+                continue
+
+            if conflicts >= budget:
+                restarts += 1
+                budget = RESTART_BASE * luby(restarts)
+                conflicts = 0
+                self.backtrack(0)
+                continue
+
+            # the assumptions come first, one decision level each
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value == -1:
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value == 0:
+                    self.enqueue(literal, None)
+                continue
+
+            literal = self.decide()
+            if literal is None:
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(literal, None)
+
+    def model(self):
+        """Returns the value of every variable after a successful solve."""
+        return {
+            variable: self.assigns[variable] == 1
+            for variable in range(1, len(self.assigns))
+        }
+
+    def enqueue(self, literal, reason):
+        variable = abs(literal)
+        self.assigns[variable] = 1 if literal > 0 else -1
+        self.level[variable] = len(self.trail_lim)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal left alone in a clause by the assignments
+        not propagated yet.
+
+        Returns the index of a clause made false, or None.
+        """
+        clauses = self.clauses
+        watches = self.watches
+        assigns = self.assigns
+        trail = self.trail
+
+        while self.qhead < len(trail):
+            false_literal = -trail[self.qhead]
+            self.qhead += 1
+            watching = watches[false_literal]
+            kept = []
+
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                value = assigns[abs(first)]
+                if (value if first > 0 else -value) == 1:
+                    kept.append(index)
+                    continue
+
+                # look for another literal to watch instead
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    value = assigns[abs(literal)]
+                    if (value if literal > 0 else -value) != -1:
+                        clause[1], clause[k] = literal, false_literal
+                        watches[literal].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    value = assigns[abs(first)]
+                    if (value if first > 0 else -value) == -1:
+                        kept.extend(watching[position + 1:])
+                        watches[false_literal] = kept
+                        self.qhead = len(trail)
+                        return index
+                    self.enqueue(first, index)
+            watches[false_literal] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Resolves the conflicting clause with the reasons of the latest
+        assignments until one literal of the current level is left.
+
+        Returns the learnt clause, asserting its first literal, and the
+        level to jump back to.
+        """
+        seen = self.seen
+        level = self.level
+        trail = self.trail
+        current = len(self.trail_lim)
+
+        learnt = [None]
+        pending = 0
+        literal = None
+        position = len(trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if not seen[variable] and level[variable] > 0:
+                    seen[variable] = True
+                    self.bump(variable)
+                    if level[variable] >= current:
+                        pending += 1
+                    else:
+                        learnt.append(other)
+
+            # the latest assignment taking part in the conflict
+            while not seen[abs(trail[position])]:
+                position -= 1
+            literal = trail[position]
+            position -= 1
+            seen[abs(literal)] = False
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reason[abs(literal)]]
+
+        learnt[0] = -literal
+        for other in learnt[1:]:
+            seen[abs(other)] = False
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # watch the literal assigned last after the asserting one
+        latest = max(range(1, len(learnt)),
+                     key=lambda i: level[abs(learnt[i])])
+        learnt[1], learnt[latest] = learnt[latest], learnt[1]
+        return learnt, level[abs(learnt[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.heap = [
+                (-self.activity[v], v)
+                for v in range(1, len(self.assigns)) if self.assigns[v] == 0
+            ]
+            self.heap.sort()
+        elif self.assigns[variable] == 0:
+            heappush(self.heap, (-self.activity[variable], variable))
+
+    def decide(self):
+        """Returns the most active unassigned variable with its last value."""
+        while self.heap:
+            _, variable = heappop(self.heap)
+            if self.assigns[variable] == 0:
+                return variable if self.phase[variable] else -variable
+        return None
+
+    def backtrack(self, level):
+        """Undoes every assignment made above `level`."""
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phase[variable] = literal > 0
+            self.assigns[variable] = 0
+            self.reason[variable] = None
+            heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = start
+
+
+def luby(i):
+    """Returns the i-th term (from 0) of the Luby sequence 1 1 2 1 1 2 4..."""
+    size, exponent = 1, 0
+    while size < i + 1:
+        exponent += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        exponent -= 1
+        i %= size
+    return 1 << exponent
+
+
+class Encoder():
+    """
+    Tseitin encoding of sentences into the clauses of a Solver.
+
+    Every symbol gets a variable, and every compound subformula gets a
+    variable made equivalent to it by a few clauses, so the clauses grow
+    linearly with the sentence. Equal subformulas share their variable.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = solver or Solver()
+        self.variables = {}
+        self.literals = {}
+        self.true = None
+
+    def variable(self, name):
+        """Returns the variable of a symbol, by name."""
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def add(self, sentence):
+        """Asserts that the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.solver.add_clause([-self.literal(sentence.antecedent),
+                                    self.literal(sentence.consequent)])
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to the sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence not in self.literals:
+            self.literals[sentence] = self.define(sentence)
+        return self.literals[sentence]
+
+    def define(self, sentence):
+        """Returns a new variable, with clauses making it the sentence."""
+        add_clause = self.solver.add_clause
+
+        if isinstance(sentence, (And, Or)):
+            if isinstance(sentence, And):
+                operands = [self.literal(c) for c in sentence.conjuncts]
+                sign = 1
+            else:
+                operands = [self.literal(d) for d in sentence.disjuncts]
+                sign = -1
+            if not operands:
+                return sign * self.constant()
+            if len(operands) == 1:
+                return operands[0]
+
+            # an Or is a negated And of the negated disjuncts
+            operands = [sign * operand for operand in operands]
+            variable = self.solver.new_variable()
+            for operand in operands:
+                add_clause([-variable, operand])
+            add_clause([variable] + [-operand for operand in operands])
+            return sign * variable
+
+        if isinstance(sentence, Implication):
+            antecedent = self.literal(sentence.antecedent)
+            consequent = self.literal(sentence.consequent)
+            variable = self.solver.new_variable()
+            add_clause([-variable, -antecedent, consequent])
+            add_clause([variable, antecedent])
+            add_clause([variable, -consequent])
+            return variable
+
+        if isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            variable = self.solver.new_variable()
+            add_clause([-variable, -left, right])
+            add_clause([-variable, left, -right])
+            add_clause([variable, left, right])
+            add_clause([variable, -left, -right])
+            return variable
+
+        raise TypeError(f"cannot encode {sentence!r}")
+
+    def constant(self):
+        """Returns a variable that is always true."""
+        if self.true is None:
+            self.true = self.solver.new_variable()
+            self.solver.add_clause([self.true])
+        return self.true
+
+    def entails(self, query):
+        """Checks if the asserted sentences entail the query."""
+        return not self.solver.solve([-self.literal(query)])
+
+
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by finding that the
+    knowledge base and the negated query can't both be true.
+    """
+    encoder = Encoder()
+    encoder.add(knowledge)
+    return encoder.entails(query)
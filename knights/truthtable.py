@@ -0,0 +1,131 @@
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Symbols whose values are packed into the bits of one integer, so each
+# chunk of the truth table covers 2 ** CHUNK_SYMBOLS models at once
+CHUNK_SYMBOLS = 16
+
+# Instructions of a compiled program
+NOT, AND, OR, IMPLIES, IFF = range(5)
+
+
+class TruthTable():
+    """
+    Sentences compiled into straight-line code over packed truth tables.
+
+    Every model of the symbols is a bit position: bit m of a table is the
+    value of a sentence in the model where symbol i is true iff bit i of m
+    is set. The first CHUNK_SYMBOLS symbols vary inside an integer, the
+    others are fixed per chunk, so each instruction evaluates a whole
+    chunk of models with one bitwise operation. Equal subformulas are
+    compiled once.
+    """
+
+    def __init__(self, sentences, symbols=()):
+        names = set(symbols)
+        for sentence in sentences:
+            names |= sentence.symbols()
+        self.symbols = sorted(names)
+        self.low = self.symbols[:CHUNK_SYMBOLS]
+        self.high = self.symbols[CHUNK_SYMBOLS:]
+
+        self.width = 1 << len(self.low)
+        self.mask = (1 << self.width) - 1
+        self.low_tables = [
+            symbol_table(bit, self.width, self.mask)
+            for bit in range(len(self.low))
+        ]
+
+        # symbols take the first registers, then one per instruction
+        self.registers = {
+            name: register for register, name in enumerate(self.symbols)
+        }
+        self.program = []
+        self.outputs = [self.compile(sentence) for sentence in sentences]
+
+    def compile(self, sentence):
+        """Returns the register holding the sentence, compiling it if new."""
+        if isinstance(sentence, Symbol):
+            return self.registers[sentence.name]
+        if sentence in self.registers:
+            return self.registers[sentence]
+
+        if isinstance(sentence, Not):
+            instruction = (NOT, (self.compile(sentence.operand),))
+        elif isinstance(sentence, And):
+            instruction = (AND, tuple(
+                self.compile(conjunct) for conjunct in sentence.conjuncts
+            ))
+        elif isinstance(sentence, Or):
+            instruction = (OR, tuple(
+                self.compile(disjunct) for disjunct in sentence.disjuncts
+            ))
+        elif isinstance(sentence, Implication):
+            instruction = (IMPLIES, (self.compile(sentence.antecedent),
+                                     self.compile(sentence.consequent)))
+        elif isinstance(sentence, Biconditional):
+            instruction = (IFF, (self.compile(sentence.left),
+                                 self.compile(sentence.right)))
+        else:
+            raise TypeError(f"cannot compile {sentence!r}")
+
+        register = len(self.symbols) + len(self.program)
+        self.program.append(instruction)
+        self.registers[sentence] = register
+        return register
+
+    def chunks(self):
+        """Returns the number of chunks covering every model."""
+        return 1 << len(self.high)
+
+    def evaluate(self, chunk):
+        """
+        Runs the program over one chunk of models.
+
+        Returns the value of every register, outputs included.
+        """
+        mask = self.mask
+        values = list(self.low_tables)
+        for bit in range(len(self.high)):
+            values.append(mask if chunk >> bit & 1 else 0)
+
+        for operation, operands in self.program:
+            if operation == NOT:
+                value = values[operands[0]] ^ mask
+            elif operation == AND:
+                value = mask
+                for operand in operands:
+                    value &= values[operand]
+            elif operation == OR:
+                value = 0
+                for operand in operands:
+                    value |= values[operand]
+            elif operation == IMPLIES:
+                value = (values[operands[0]] ^ mask) | values[operands[1]]
+            else:
+                value = values[operands[0]] ^ values[operands[1]] ^ mask
+            values.append(value)
+        return values
+
+
+def symbol_table(bit, width, mask):
+    """
+    Returns the truth table of the symbol varying with `bit` of the model
+    number: runs of 2 ** bit zeros then ones, repeated `width` bits long.
+    """
+    half = 1 << bit
+    block = ((1 << half) - 1) << half
+    return block * (mask // ((1 << (2 * half)) - 1))
+
+
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, comparing their compiled
+    truth tables a chunk of models at a time.
+    """
+    table = TruthTable([knowledge, query])
+    knowledge_register, query_register = table.outputs
+    for chunk in range(table.chunks()):
+        values = table.evaluate(chunk)
+        if values[knowledge_register] & (values[query_register] ^ table.mask):
+            return False
+    return True
@@ -0,0 +1,196 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pagerank
+from matrix import LinkMatrix
+from solvers import SOLVERS, solve
+
+SIZES = [1000, 10000]
+
+# Average number of links per page of the generated corpora
+DEGREE = 8
+
+# Share of generated pages without any links
+DANGLING = 0.1
+
+# Exponent of the power law of the link counts and page popularity
+ALPHA = 2.0
+
+MODELS = ["uniform", "power-law"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time crawling and ranking synthetic corpora."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="numbers of pages to generate")
+    parser.add_argument("--model", choices=MODELS, default="power-law",
+                        help="how link counts and targets are drawn")
+    parser.add_argument("--degree", type=float, default=DEGREE,
+                        help="average number of links per page")
+    parser.add_argument("--dangling", type=float, default=DANGLING,
+                        help="share of pages without links")
+    parser.add_argument("--samples", type=int, default=pagerank.SAMPLES,
+                        help="samples taken by sample_pagerank")
+    parser.add_argument("--solver", choices=SOLVERS, default="power",
+                        help="solver used by iterate_pagerank")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="FILE",
+                        help="save the timings of every corpus size to FILE "
+                             "as JSON (printed otherwise)")
+    args = parser.parse_args()
+
+    results = {
+        "model": args.model,
+        "degree": args.degree,
+        "dangling": args.dangling,
+        "samples": args.samples,
+        "solver": args.solver,
+        "seed": args.seed,
+        "runs": [],
+    }
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            links = generate_corpus(
+                directory, size, args.model, args.degree, args.dangling,
+                random.Random(args.seed)
+            )
+            run = benchmark_corpus(directory, args.samples, args.solver)
+            run["pages"] = size
+            run["links"] = links
+            results["runs"].append(run)
+        print(f"{size} pages done", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+def generate_corpus(directory, size, model, degree, dangling, rng):
+    """
+    Writes `size` HTML pages linking to each other into `directory`.
+
+    With the uniform model every page gets up to twice `degree` links to
+    pages chosen uniformly. With the power-law model both the number of
+    links of a page and how often a page is linked to follow a power law,
+    like the web: a few hubs link to many pages, a few pages are linked
+    to by most. Either way a `dangling` share of pages has no links.
+
+    Returns the number of links written.
+    """
+    names = [f"page{i}.html" for i in range(size)]
+
+    if model == "power-law":
+        # Pareto link counts scaled to average `degree`, and Zipf
+        # popularity over the pages in a random order
+        scale = degree * (ALPHA - 1) / ALPHA
+        popularity = list(range(size))
+        rng.shuffle(popularity)
+        cumulative = list(itertools.accumulate(
+            1 / (rank + 1) ** (ALPHA - 1) for rank in popularity
+        ))
+
+        def links_for(page):
+            count = min(size - 1, int(scale * rng.paretovariate(ALPHA)))
+            return set(rng.choices(range(size), cum_weights=cumulative,
+                                   k=count)) - {page}
+    elif model == "uniform":
+        def links_for(page):
+            count = min(size - 1, rng.randint(0, int(2 * degree)))
+            return set(rng.sample(range(size), count)) - {page}
+    else:
+        raise ValueError(f"unknown model {model!r}")
+
+    total = 0
+    for page, name in enumerate(names):
+        links = set() if rng.random() < dangling else links_for(page)
+        total += len(links)
+        anchors = "\n".join(
+            f'<a href="{names[link]}">{names[link]}</a>'
+            for link in sorted(links)
+        )
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<body>\n{anchors}\n"
+                    f"</body>\n</html>\n")
+    return total
+
+
+def benchmark_corpus(directory, samples, solver):
+    """
+    Times crawl, sample_pagerank and iterate_pagerank on a corpus.
+
+    Returns a dictionary of seconds, throughput and peak memory (traced
+    Python allocations, which leave out crawl's worker processes) for
+    each of them.
+    """
+    corpus, crawl_stats = measure(pagerank.crawl, directory)
+    pages = len(corpus)
+    links = sum(len(corpus[page]) for page in corpus)
+    crawl_stats["pages_per_second"] = rate(pages, crawl_stats["seconds"])
+
+    _, sample_stats = measure(
+        pagerank.sample_pagerank, corpus, pagerank.DAMPING, samples
+    )
+    sample_stats["samples_per_second"] = rate(
+        samples, sample_stats["seconds"]
+    )
+
+    # the sweeps are counted apart, so iterate_pagerank itself is timed
+    _, residuals = solve(
+        LinkMatrix.from_corpus(corpus), pagerank.DAMPING, solver
+    )
+    _, iterate_stats = measure(
+        pagerank.iterate_pagerank, corpus, pagerank.DAMPING,
+        solver=solver
+    )
+    iterate_stats["sweeps"] = len(residuals)
+    iterate_stats["links_per_second"] = rate(
+        links * len(residuals), iterate_stats["seconds"]
+    )
+
+    return {
+        "crawl": crawl_stats,
+        "sample_pagerank": sample_stats,
+        "iterate_pagerank": iterate_stats,
+    }
+
+
+def measure(function, *args, **kwargs):
+    """
+    Runs one crawling or ranking step on the corpus, then runs it again
+    with tracemalloc on to see how much memory it peaks at. Tracing slows
+    every allocation, so its run isn't the one timed.
+
+    Returns what the first run returned, with its seconds and peak bytes.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, {"seconds": seconds, "peak_bytes": peak}
+
+
+def rate(count, seconds):
+    return count / seconds if seconds else None
+
+
+if __name__ == "__main__":
+    main()
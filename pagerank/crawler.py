@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import re
+from array import array
+
+from matrix import INDEX_TYPE
+
+# Bytes read from a page at a time
+CHUNK_SIZE = 1 << 16
+
+# Corpora with fewer pages than this are parsed without a process pool
+PARALLEL_THRESHOLD = 256
+
+# Pages handed to a worker process at a time
+BATCH = 64
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Directory and page numbers the worker processes read, inherited on fork
+worker_directory = None
+worker_index = None
+
+
+def crawl_edges(directory, processes=None):
+    """
+    Parse a directory of HTML pages and collect the links between them,
+    streaming each page in chunks and spreading the pages over a pool of
+    worker processes for large corpora.
+
+    Return the sorted list of pages, and the links as two parallel arrays
+    of page numbers (sources and targets). Each link is listed once, and
+    links to the page itself or outside the corpus are dropped.
+    """
+    pages = sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html")
+    )
+    index = {page: i for i, page in enumerate(pages)}
+
+    sources = array(INDEX_TYPE)
+    targets = array(INDEX_TYPE)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if (processes > 1 and len(pages) >= PARALLEL_THRESHOLD
+            and "fork" in multiprocessing.get_all_start_methods()):
+        with multiprocessing.get_context("fork").Pool(
+            processes, initializer=init_worker, initargs=(directory, index)
+        ) as pool:
+            results = pool.imap_unordered(parse_page, pages, chunksize=BATCH)
+            for source, links in results:
+                sources.extend([source] * len(links))
+                targets.extend(links)
+    else:
+        init_worker(directory, index)
+        for page in pages:
+            source, links = parse_page(page)
+            sources.extend([source] * len(links))
+            targets.extend(links)
+
+    return pages, sources, targets
+
+
+def init_worker(directory, index):
+    global worker_directory, worker_index
+    worker_directory = directory
+    worker_index = index
+
+
+def parse_page(page):
+    """
+    Returns the number of a page and an array of the numbers of the
+    other pages of the corpus it links to.
+    """
+    source = worker_index[page]
+    links = set()
+    for link in extract_links(os.path.join(worker_directory, page)):
+        target = worker_index.get(link)
+        if target is not None and target != source:
+            links.add(target)
+    return source, array(INDEX_TYPE, sorted(links))
+
+
+def extract_links(path):
+    """
+    Returns the set of every href of an <a> tag in the file, reading it
+    CHUNK_SIZE bytes at a time.
+    """
+    links = set()
+    with open(path, "rb") as f:
+        carry = b""
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            buffer = carry + chunk
+            for match in LINK.finditer(buffer):
+                links.add(match.group(1).decode("utf-8", errors="replace"))
+            if not chunk:
+                break
+
+            # keep an unfinished tag at the end for the next chunk
+            start = buffer.rfind(b"<")
+            if start != -1 and buffer.find(b">", start) == -1:
+                carry = buffer[start:]
+            else:
+                carry = b""
+    return links
@@ -0,0 +1,173 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from matrix import INDEX_TYPE, LinkMatrix
+from sampler import RandomSurfer
+
+# Part of the header, a graph file of any other version is crawled again
+GRAPH_VERSION = 2
+GRAPH_NAME = "pagerank.graph"
+MAGIC = b"PAGERANK"
+
+# Typecode of the offsets, wide enough for more links than fit in memory
+OFFSET_TYPE = "q"
+
+# Page names, then compressed sparse rows of the links both ways: the
+# outgoing links for the random surfer, the incoming ones for iteration
+SECTIONS = [
+    ("pages", None),
+    ("out_offsets", OFFSET_TYPE), ("out_targets", INDEX_TYPE),
+    ("in_offsets", OFFSET_TYPE), ("in_sources", INDEX_TYPE),
+]
+
+# magic, version, byte order, index size, the (count, total size, latest
+# mtime, digest of the names) of the corpus pages, then an (offset,
+# length) pair per section
+HEADER = struct.Struct(f"<8sIBB2x3q32s{2 * len(SECTIONS)}q")
+
+# Separates the page names
+SEPARATOR = "\0"
+
+# Padding before each section, so its offsets and page numbers can be
+# cast from the mapping in place
+ALIGNMENT = 8
+
+# The links are only read back on machines storing integers the same way
+BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+
+def graph_path(directory):
+    return os.path.join(directory, GRAPH_NAME)
+
+
+def corpus_signature(directory):
+    """
+    Returns the number of HTML pages in the directory, their total size,
+    their latest modification time and a SHA-256 digest of their sorted
+    names, which catches a page renamed without changing its contents.
+    """
+    count = size = latest = 0
+    names = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".html"):
+                stat = entry.stat()
+                count += 1
+                size += stat.st_size
+                latest = max(latest, stat.st_mtime_ns)
+                names.append(entry.name)
+    digest = hashlib.sha256(
+        SEPARATOR.join(sorted(names)).encode("utf-8")
+    ).digest()
+    return [count, size, latest, digest]
+
+
+def save(directory, pages, sources, targets):
+    """
+    Writes the crawled links of a corpus (as returned by crawl_edges)
+    into the corpus directory.
+
+    Returns False if the directory isn't writable.
+    """
+    signature = corpus_signature(directory)
+    surfer = RandomSurfer.from_edges(pages, zip(sources, targets))
+    matrix = LinkMatrix.from_edges(pages, zip(sources, targets))
+
+    sections = [
+        SEPARATOR.join(pages).encode("utf-8"),
+        array(OFFSET_TYPE, surfer.offsets).tobytes(),
+        surfer.targets.tobytes(),
+        array(OFFSET_TYPE, matrix.offsets).tobytes(),
+        matrix.sources.tobytes(),
+    ]
+
+    positions = []
+    offset = HEADER.size
+    for data in sections:
+        offset += -offset % ALIGNMENT
+        positions.extend([offset, len(data)])
+        offset += len(data)
+
+    header = HEADER.pack(
+        MAGIC, GRAPH_VERSION, BYTE_ORDER,
+        array(INDEX_TYPE).itemsize, *signature, *positions
+    )
+
+    # a ranking run may have the old graph mapped, swap the new one in
+    # only once it is complete
+    path = graph_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(header)
+            for data, offset in zip(sections, positions[::2]):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        return False
+    return True
+
+
+def load(directory):
+    """
+    Memory maps the graph file in the corpus directory, so the links are
+    read from disk as the engines stream over them.
+
+    Returns a LinkMatrix and a RandomSurfer over the mapped links, or None
+    if there is no graph file, or it is from another version or machine,
+    or the pages changed since it was written.
+    """
+    path = graph_path(directory)
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapped) < HEADER.size:
+        return None
+    header = HEADER.unpack_from(mapped)
+    magic, version, order, itemsize = header[:4]
+    signature = list(header[4:8])
+    positions = header[8:]
+
+    if (magic != MAGIC or version != GRAPH_VERSION
+            or order != BYTE_ORDER
+            or itemsize != array(INDEX_TYPE).itemsize):
+        return None
+    try:
+        if signature != corpus_signature(directory):
+            return None
+    except OSError:
+        return None
+    if any(offset + length > len(mapped)
+           for offset, length in zip(positions[::2], positions[1::2])):
+        return None
+
+    view = memoryview(mapped)
+    sections = [
+        view[offset:offset + length]
+        for offset, length in zip(positions[::2], positions[1::2])
+    ]
+    names = str(sections[0], "utf-8")
+    pages = names.split(SEPARATOR) if names else []
+    out_offsets, out_targets, in_offsets, in_sources = [
+        section.cast(typecode)
+        for section, (_, typecode) in zip(sections[1:], SECTIONS[1:])
+    ]
+
+    out_degree = array(INDEX_TYPE, [
+        out_offsets[page + 1] - out_offsets[page]
+        for page in range(len(pages))
+    ])
+    matrix = LinkMatrix(pages, in_offsets, in_sources, out_degree)
+    surfer = RandomSurfer(pages, out_offsets, out_targets)
+    return matrix, surfer
+
@@ -0,0 +1,335 @@
+import os
+import pickle
+from array import array
+from collections import deque
+
+from matrix import INDEX_TYPE, LinkMatrix, TOLERANCE
+
+# Bump whenever the saved state changes shape, older states are then rejected
+STATE_VERSION = 1
+
+
+class IncrementalRanker():
+    """
+    PageRank that follows small changes to the corpus.
+
+    Besides the ranks it keeps every page's residual, how far the page is
+    from satisfying the PageRank equation. A change to the links of a page
+    only disturbs the residuals of the pages it links to, and those are
+    pushed back towards zero one page at a time (Gauss-Southwell), so work
+    stays near the change. Changes reaching every page at once, from pages
+    without links or from a new page changing the corpus size, are kept
+    as a single `uniform` residual until it is large enough to matter.
+    """
+
+    def __init__(self, pages, edges, damping_factor, ranks=None,
+                 tolerance=TOLERANCE, residuals=None):
+        """
+        Builds the ranker over a list of pages and an iterable of
+        (source, target) page numbers, starting from `ranks` (a list
+        in the order of pages) or from a full power iteration.
+
+        Residuals saved along with `ranks` can be passed back in to
+        skip recomputing them.
+        """
+        self.pages = list(pages)
+        self.index = {page: i for i, page in enumerate(self.pages)}
+        self.damping_factor = damping_factor
+        self.tolerance = tolerance
+
+        self.links = [set() for _ in self.pages]
+        self.linked_from = [set() for _ in self.pages]
+        for source, target in edges:
+            if source != target:
+                self.links[source].add(target)
+                self.linked_from[target].add(source)
+
+        if ranks is None:
+            matrix = LinkMatrix.from_edges(self.pages, self.edges())
+            ranks = matrix.power_iteration(damping_factor, tolerance)
+        self.ranks = list(ranks)
+        if residuals is None:
+            self.reset_residuals()
+        else:
+            self.dangling = sum(
+                rank for rank, links in zip(self.ranks, self.links)
+                if not links
+            )
+            self.residuals = list(residuals)
+            self.uniform = 0.0
+            self.queue = deque()
+            self.queued = [False] * len(self.pages)
+        self.update()
+
+    @classmethod
+    def from_corpus(cls, corpus, damping_factor, ranks=None,
+                    tolerance=TOLERANCE):
+        """
+        Builds the ranker from a dictionary mapping every page to the set
+        of pages it links to, warm started from a dictionary of ranks.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        edges = [
+            (index[page], index[link])
+            for page in pages for link in corpus[page] if link in index
+        ]
+        if ranks is not None:
+            ranks = [ranks.get(page, 0.0) for page in pages]
+        return cls(pages, edges, damping_factor, ranks, tolerance)
+
+    def edges(self):
+        """Yields every link as a (source, target) pair of page numbers."""
+        for source, targets in enumerate(self.links):
+            for target in targets:
+                yield source, target
+
+    def to_dict(self):
+        """Returns a dictionary mapping each page to its rank."""
+        return dict(zip(self.pages, self.ranks))
+
+    def reset_residuals(self):
+        """Recomputes every residual from the ranks, reading every link."""
+        n = len(self.pages)
+        d = self.damping_factor
+        self.dangling = sum(
+            rank for rank, links in zip(self.ranks, self.links) if not links
+        )
+        base = (1 - d) / n + d * self.dangling / n
+        self.residuals = [
+            base + d * sum(
+                self.ranks[source] / len(self.links[source])
+                for source in self.linked_from[page]
+            ) - self.ranks[page]
+            for page in range(n)
+        ]
+        self.uniform = 0.0
+        self.queue = deque(range(n))
+        self.queued = [True] * n
+
+    def add_page(self, page):
+        """Adds a page without links, returning its number."""
+        if page in self.index:
+            return self.index[page]
+        n = len(self.pages)
+        d = self.damping_factor
+
+        # every page's share of the random jumps shrinks
+        self.uniform += ((1 - d) + d * self.dangling) * (1 / (n + 1) - 1 / n)
+
+        number = n
+        self.pages.append(page)
+        self.index[page] = number
+        self.links.append(set())
+        self.linked_from.append(set())
+        self.ranks.append(0.0)
+        self.residuals.append(
+            (1 - d) / (n + 1) + d * self.dangling / (n + 1) - self.uniform
+        )
+        self.queued.append(False)
+        self.enqueue(number)
+        return number
+
+    def add_link(self, source, target):
+        """Adds a link between two pages (names), adding missing pages."""
+        source = self.add_page(source)
+        target = self.add_page(target)
+        if source == target or target in self.links[source]:
+            return
+        self.relink(source, self.links[source] | {target})
+
+    def remove_link(self, source, target):
+        """Removes a link between two pages (names) if there is one."""
+        source = self.index.get(source)
+        target = self.index.get(target)
+        if source is None or target not in self.links[source]:
+            return
+        self.relink(source, self.links[source] - {target})
+
+    def remove_page(self, page):
+        """
+        Removes a page (name) and every link to or from it, if there is
+        such a page. The last page takes its number.
+        """
+        number = self.index.pop(page, None)
+        if number is None:
+            return
+        for source in list(self.linked_from[number]):
+            self.relink(source, self.links[source] - {number})
+        self.relink(number, set())
+
+        # take back the rank it handed every page, then shrink the corpus
+        n = len(self.pages)
+        d = self.damping_factor
+        rank = self.ranks[number]
+        self.uniform -= d * rank / n
+        self.dangling -= rank
+        if n > 1:
+            # every page's share of the random jumps grows
+            self.uniform += (
+                ((1 - d) + d * self.dangling) * (1 / (n - 1) - 1 / n)
+            )
+
+        last = n - 1
+        if number != last:
+            moved = self.pages[last]
+            self.pages[number] = moved
+            self.index[moved] = number
+            for target in self.links[last]:
+                self.linked_from[target].discard(last)
+                self.linked_from[target].add(number)
+            for source in self.linked_from[last]:
+                self.links[source].discard(last)
+                self.links[source].add(number)
+            for column in (self.links, self.linked_from, self.ranks,
+                           self.residuals, self.queued):
+                column[number] = column[last]
+        for column in (self.pages, self.links, self.linked_from, self.ranks,
+                       self.residuals, self.queued):
+            column.pop()
+        self.queue = deque(
+            number if queued == last else queued
+            for queued in self.queue if queued != number
+        )
+
+    def relink(self, source, links):
+        """
+        Replaces the links of a page, adjusting the residuals of the pages
+        it linked to before and after.
+        """
+        d = self.damping_factor
+        rank = self.ranks[source]
+        old = self.links[source]
+
+        # undo what the page handed out, to its links or to every page
+        if old:
+            for target in old:
+                self.residuals[target] -= d * rank / len(old)
+                self.enqueue(target)
+        else:
+            self.uniform -= d * rank / len(self.pages)
+            self.dangling -= rank
+
+        for target in old - links:
+            self.linked_from[target].discard(source)
+        for target in links - old:
+            self.linked_from[target].add(source)
+        self.links[source] = set(links)
+
+        if links:
+            for target in links:
+                self.residuals[target] += d * rank / len(links)
+                self.enqueue(target)
+        else:
+            self.uniform += d * rank / len(self.pages)
+            self.dangling += rank
+
+    def sync(self, pages, edges):
+        """
+        Brings the graph in line with a fresh crawl, given as a list of
+        pages and an iterable of (source, target) numbers into that list,
+        only touching pages whose links changed. Pages missing from the
+        crawl are removed.
+        """
+        for page in pages:
+            self.add_page(page)
+        for page in set(self.pages).difference(pages):
+            self.remove_page(page)
+        numbers = [self.index[page] for page in pages]
+        crawled = [set() for _ in pages]
+        for source, target in edges:
+            if source != target:
+                crawled[source].add(numbers[target])
+        for source, links in zip(numbers, crawled):
+            if links != self.links[source]:
+                self.relink(source, links)
+
+    def update(self):
+        """
+        Pushes residuals until every page is within tolerance / N of its
+        PageRank equation.
+
+        Returns the number of pushes made.
+        """
+        if not self.pages:
+            return 0
+        d = self.damping_factor
+        threshold = self.tolerance / len(self.pages)
+        pushes = 0
+
+        while True:
+            while self.queue:
+                page = self.queue.popleft()
+                self.queued[page] = False
+                delta = self.residuals[page]
+                if abs(delta) <= threshold:
+                    continue
+
+                # settle the page, and hand the change on like its rank
+                self.ranks[page] += delta
+                self.residuals[page] = 0.0
+                pushes += 1
+                links = self.links[page]
+                if links:
+                    share = d * delta / len(links)
+                    for target in links:
+                        self.residuals[target] += share
+                        self.enqueue(target)
+                else:
+                    self.uniform += d * delta / len(self.pages)
+                    self.dangling += delta
+
+            if abs(self.uniform) <= threshold:
+                return pushes
+
+            # spread the change that reaches every page
+            for page in range(len(self.pages)):
+                self.residuals[page] += self.uniform
+                self.enqueue(page)
+            self.uniform = 0.0
+
+    def enqueue(self, page):
+        if not self.queued[page]:
+            self.queued[page] = True
+            self.queue.append(page)
+
+    def save(self, path):
+        """Writes the pages, links, ranks and residuals to a file."""
+        self.update()
+        state = {
+            "version": STATE_VERSION,
+            "damping_factor": self.damping_factor,
+            "tolerance": self.tolerance,
+            "pages": self.pages,
+            "links": [
+                array(INDEX_TYPE, sorted(links)) for links in self.links
+            ],
+            "ranks": array("d", self.ranks),
+            "residuals": array("d", self.residuals),
+        }
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a ranker written by save, warm started from its ranks.
+
+        Returns None if there is no such file or it is from another version.
+        """
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if state.get("version") != STATE_VERSION:
+            return None
+        edges = [
+            (source, target)
+            for source, links in enumerate(state["links"])
+            for target in links
+        ]
+        return cls(state["pages"], edges, state["damping_factor"],
+                   state["ranks"], state["tolerance"], state["residuals"])
@@ -0,0 +1,279 @@
+from array import array
+from bisect import bisect_right
+from operator import mul
+
+# Typecode for the integer buffers of the matrix (32 bit signed ints)
+INDEX_TYPE = "i"
+
+# Stop iterating once the ranks change by less than this in total (L1)
+TOLERANCE = 1e-6
+
+# Give up iterating after this many sweeps over the links
+MAX_ITERATIONS = 1000
+
+# Links read into memory at a time when sweeping over memory mapped links
+BLOCK_LINKS = 1 << 18
+
+
+class LinkMatrix():
+    """
+    Sparse transition matrix of a corpus.
+
+    Pages are numbered in order, and the pages linking to page `i` are
+    `sources[offsets[i]:offsets[i + 1]]` (compressed sparse rows of the
+    transposed link graph), so one PageRank sweep reads each link once.
+    Pages without links are treated as linking to every page.
+
+    The buffers can be arrays or memoryviews over a memory mapped file
+    (see graphfile), in which case sweeps stream over the links in blocks.
+    """
+
+    def __init__(self, pages, offsets, sources, out_degree):
+        self.pages = pages
+        self.offsets = offsets
+        self.sources = sources
+        self.out_degree = out_degree
+
+        self.index = {page: i for i, page in enumerate(pages)}
+        self.dangling = array(INDEX_TYPE, [
+            page for page, degree in enumerate(out_degree) if degree == 0
+        ])
+        self.inverse_degree = [
+            1 / degree if degree else 0.0 for degree in out_degree
+        ]
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds the matrix from a dictionary mapping every page to the
+        set of pages it links to. Links outside the corpus are ignored.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        edges = (
+            (index[page], index[link])
+            for page in pages for link in corpus[page]
+            if link in index and link != page
+        )
+        return cls.from_edges(pages, edges)
+
+    @classmethod
+    def from_edges(cls, pages, edges):
+        """
+        Builds the matrix from a list of pages and an iterable of
+        (source, target) page numbers, each link listed once.
+        """
+        sources = array(INDEX_TYPE)
+        targets = array(INDEX_TYPE)
+        for source, target in edges:
+            sources.append(source)
+            targets.append(target)
+
+        out_degree = array(INDEX_TYPE, [0]) * len(pages)
+        for source in sources:
+            out_degree[source] += 1
+
+        # bucket the sources by target
+        offsets = array(INDEX_TYPE, [0]) * (len(pages) + 1)
+        for target in targets:
+            offsets[target + 1] += 1
+        for page in range(len(pages)):
+            offsets[page + 1] += offsets[page]
+        ordered = array(INDEX_TYPE, [0]) * len(sources)
+        cursor = offsets[:-1]
+        for source, target in zip(sources, targets):
+            ordered[cursor[target]] = source
+            cursor[target] += 1
+
+        return cls(pages, offsets, ordered, out_degree)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def step(self, ranks, damping_factor, teleport=None, in_links=None):
+        """
+        Returns the ranks after one step of the random surfer, jumping
+        according to the `teleport` distribution (uniform if None).
+
+        `in_links` can hold the slices of `sources` for every page, to
+        reuse them across steps.
+        """
+        n = len(self.pages)
+        if in_links is None:
+            in_links = self.in_links()
+
+        # what each page hands to every page it links to
+        share_of = list(map(mul, ranks, self.inverse_degree)).__getitem__
+
+        # pages without links spread their rank like a random jump
+        dangling = sum(map(ranks.__getitem__, self.dangling))
+        jump = (1 - damping_factor) + damping_factor * dangling
+
+        if teleport is None:
+            base = jump / n
+            return [
+                base + damping_factor * sum(map(share_of, links))
+                for links in in_links
+            ]
+        return [
+            jump * weight + damping_factor * sum(map(share_of, links))
+            for weight, links in zip(teleport, in_links)
+        ]
+
+    def sweep(self, rank_lists, damping_factor, teleports, in_links=None):
+        """
+        Returns the ranks after one step for several distributions at
+        once, each jumping according to its teleport distribution
+        (uniform if None). The incoming links of every page are read once,
+        summing the shares of all the distributions.
+        """
+        n = len(self.pages)
+        if in_links is None:
+            in_links = self.in_links()
+
+        # what each page hands to every page it links to, one column per
+        # distribution, so a page's links are summed for all of them at once
+        shares_of = list(zip(*[
+            map(mul, ranks, self.inverse_degree) for ranks in rank_lists
+        ])).__getitem__
+        nothing = (0.0,) * len(rank_lists)
+        rows = [
+            tuple(map(sum, zip(*map(shares_of, links)))) or nothing
+            for links in in_links
+        ]
+        link_sums = zip(*rows) if rows else [[] for _ in rank_lists]
+
+        results = []
+        for ranks, teleport, sums in zip(rank_lists, teleports, link_sums):
+            dangling = sum(map(ranks.__getitem__, self.dangling))
+            jump = (1 - damping_factor) + damping_factor * dangling
+            if teleport is None:
+                base = jump / n
+                results.append([base + damping_factor * s for s in sums])
+            else:
+                results.append([
+                    jump * weight + damping_factor * s
+                    for weight, s in zip(teleport, sums)
+                ])
+        return results
+
+    def in_links(self):
+        """
+        Returns the slice of `sources` linking to each page, or a
+        LinkStream producing them block by block for mapped links.
+        """
+        if isinstance(self.sources, memoryview):
+            return LinkStream(self.offsets, self.sources)
+        offsets = self.offsets
+        sources = self.sources
+        return [
+            sources[offsets[page]:offsets[page + 1]]
+            for page in range(len(self.pages))
+        ]
+
+    def power_iteration(self, damping_factor, tolerance=TOLERANCE,
+                        max_iterations=MAX_ITERATIONS, teleport=None):
+        """
+        Repeats steps from the uniform distribution until the ranks
+        change by less than `tolerance` (L1), or `max_iterations` steps.
+
+        Returns the list of ranks, in the order of `pages`.
+        """
+        return self.personalized(
+            damping_factor, [teleport], tolerance, max_iterations
+        )[0]
+
+    def personalized(self, damping_factor, teleports, tolerance=TOLERANCE,
+                     max_iterations=MAX_ITERATIONS):
+        """
+        Runs power iteration for many teleport distributions at once,
+        sharing the link structure between them. A teleport distribution
+        is a list of weights in the order of `pages` summing to 1, or
+        None for the uniform one. Each stops on its own once it changes
+        by less than `tolerance` (L1), or after `max_iterations` steps.
+
+        Returns a list of ranks for each teleport distribution.
+        """
+        n = len(self.pages)
+        in_links = self.in_links()
+        results = [[1 / n] * n for _ in teleports]
+        running = list(range(len(teleports)))
+
+        for _ in range(max_iterations):
+            if not running:
+                break
+            # one pass over the links per sweep, whatever the number running
+            if len(running) == 1:
+                i = running[0]
+                swept = [self.step(results[i], damping_factor, teleports[i],
+                                   in_links)]
+            else:
+                swept = self.sweep([results[i] for i in running],
+                                   damping_factor,
+                                   [teleports[i] for i in running], in_links)
+
+            still_running = []
+            for i, new_ranks in zip(running, swept):
+                change = sum(
+                    abs(new - old) for new, old in zip(new_ranks, results[i])
+                )
+                results[i] = new_ranks
+                if change >= tolerance:
+                    still_running.append(i)
+            running = still_running
+
+        return results
+
+    def teleport_vector(self, seeds):
+        """
+        Returns a teleport distribution from either a dictionary of page
+        weights or a collection of seed pages (weighted equally).
+        Pages outside the corpus are ignored.
+        """
+        if not isinstance(seeds, dict):
+            seeds = dict.fromkeys(seeds, 1)
+        weights = [0.0] * len(self.pages)
+        for page, weight in seeds.items():
+            if page in self.index:
+                weights[self.index[page]] += weight
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("teleport distribution has no weight in corpus")
+        return [weight / total for weight in weights]
+
+    def to_dict(self, ranks):
+        """Returns a dictionary mapping each page to its rank."""
+        return dict(zip(self.pages, ranks))
+
+
+class LinkStream():
+    """
+    The slices of a memory mapped CSR buffer, one per page, read from
+    disk about BLOCK_LINKS links at a time while iterating, so only one
+    block of links is held in memory during a sweep.
+    """
+
+    def __init__(self, offsets, links):
+        self.offsets = offsets
+        self.links = links
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, page):
+        return self.links[self.offsets[page]:self.offsets[page + 1]]
+
+    def __iter__(self):
+        offsets = self.offsets
+        n = len(offsets) - 1
+        start = 0
+        while start < n:
+            # as many pages as fit in a block, at least one
+            first = offsets[start]
+            end = bisect_right(offsets, first + BLOCK_LINKS, start + 1, n + 1)
+            end = max(end - 1, start + 1)
+
+            block = self.links[first:offsets[end]].tolist()
+            for page in range(start, end):
+                yield block[offsets[page] - first:offsets[page + 1] - first]
+            start = end
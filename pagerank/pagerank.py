@@ -1,52 +1,149 @@
-import os
-import random
-import re
-import sys
-from collections import Counter
+import argparse
+
+import graphfile
+from crawler import crawl_edges
+from incremental import IncrementalRanker
+from matrix import LinkMatrix, MAX_ITERATIONS, TOLERANCE
+from sampler import RandomSurfer, WALKERS, parallel_walk
+from solvers import SOLVERS, solve
 
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
+    parser = argparse.ArgumentParser(description="Rank a corpus of pages.")
+    parser.add_argument("corpus")
+    parser.add_argument(
+        "--tolerance", type=float,
+        help="sample with parallel walkers until within this L1 error "
+             "of the iterated ranks, instead of taking SAMPLES samples"
+    )
+    parser.add_argument(
+        "--state", metavar="FILE",
+        help="keep the links and ranks in FILE, so later runs only update "
+             "the ranks around pages whose links changed"
+    )
+    parser.add_argument(
+        "--solver", choices=SOLVERS, default="power",
+        help="method used to iterate the ranks (default: power)"
+    )
+    args = parser.parse_args()
+
+    # rank straight from the mapped links, without a dictionary of sets
+    matrix, surfer = load_graph(args.corpus)
+    pages = matrix.pages
+
+    if args.tolerance is None:
+        ranks = surfer.to_dict(surfer.walk(DAMPING, SAMPLES))
+        print(f"PageRank Results from Sampling (n = {SAMPLES})")
+    else:
+        counts, history = parallel_walk(
+            surfer, DAMPING, matrix.power_iteration(DAMPING), args.tolerance
+        )
+        ranks = surfer.to_dict(counts)
+        samples, error = history[-1]
+        print(f"PageRank Results from Sampling (n = {samples}, "
+              f"error = {error:.4f})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
-    print(f"PageRank Results from Iteration")
+    if args.state:
+        ranks = update_state(args.state, pages, surfer.edges())
+        print(f"PageRank Results from Iteration")
+    else:
+        ranks, residuals = solve(matrix, DAMPING, args.solver)
+        ranks = matrix.to_dict(ranks)
+        print(f"PageRank Results from Iteration ({args.solver}, "
+              f"{len(residuals)} sweeps, residual = {residuals[-1]:.2e})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
 
+def personalized_pagerank(corpus, damping_factor, teleport):
+    """
+    Return PageRank values for each page when random jumps land
+    according to `teleport` instead of uniformly: either a dictionary
+    of page weights, or a collection of seed pages.
+
+    Return a dictionary where keys are page names, and values are
+    their PageRank value. All PageRank values should sum to 1.
+    """
+    return personalized_pagerank_batch(corpus, damping_factor, [teleport])[0]
+
+
+def personalized_pagerank_batch(corpus, damping_factor, teleports):
+    """
+    Return personalized PageRank values for a list of teleport
+    distributions (see personalized_pagerank), all computed together
+    over a single transition matrix.
+
+    Return a list of dictionaries, one per teleport distribution.
+    """
+    matrix = LinkMatrix.from_corpus(corpus)
+    vectors = [matrix.teleport_vector(teleport) for teleport in teleports]
+    return [
+        matrix.to_dict(ranks)
+        for ranks in matrix.personalized(damping_factor, vectors)
+    ]
+
+
+def load_graph(directory):
+    """
+    Memory map the links of the corpus in `directory` from its graph file,
+    crawling the pages and writing the graph file first if it is missing
+    or out of date.
+
+    Return a LinkMatrix and a RandomSurfer over the links.
+    """
+    loaded = graphfile.load(directory)
+    if loaded is not None:
+        return loaded
+
+    pages, sources, targets = crawl_edges(directory)
+    if graphfile.save(directory, pages, sources, targets):
+        loaded = graphfile.load(directory)
+        if loaded is not None:
+            return loaded
+
+    # the directory isn't writable, keep the links in memory
+    return (LinkMatrix.from_edges(pages, zip(sources, targets)),
+            RandomSurfer.from_edges(pages, zip(sources, targets)))
+
+
+def update_state(path, pages, edges):
+    """
+    Loads the incremental ranker saved at `path`, brings it up to date
+    with the crawled links, an iterable of (source, target) page numbers,
+    and saves it back. Starts a new one if there
+    is none, or if it was made with another damping factor.
+
+    Return the dictionary of PageRank values of the crawled pages.
+    """
+    ranker = IncrementalRanker.load(path)
+    if ranker is None or ranker.damping_factor != DAMPING:
+        ranker = IncrementalRanker(pages, edges, DAMPING)
+    else:
+        ranker.sync(pages, edges)
+        ranker.update()
+    ranker.save(path)
+
+    ranks = ranker.to_dict()
+    return {page: ranks[page] for page in pages}
+
+
 def crawl(directory):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
     """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
+    pages, sources, targets = crawl_edges(directory)
 
-    return pages
+    corpus = {page: set() for page in pages}
+    for source, target in zip(sources, targets):
+        corpus[pages[source]].add(pages[target])
+
+    return corpus
 
 
 def transition_model(corpus, page, damping_factor):
@@ -96,91 +193,74 @@ def sample_pagerank(corpus, damping_factor, n):
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    The corpus links are laid out once so that each sample is drawn in
+    constant time, rather than building a transition model per sample.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # util function
-    def get_sample(distribution):
-        """
-        Selects and returns a sample given a probability distribution
-        """
-        all_pages = list(distribution.keys())
-        all_probs = list(distribution.values())
-        sample = random.choices(all_pages, all_probs)
-
-        return sample[0]
-
-    # generate first sample randomly
-    first_sample = random.choice(list(corpus.keys()))
-    sample_counter = Counter()
-
-    sample_counter[first_sample] += 1
-
-    last_sample = first_sample
+    surfer = RandomSurfer.from_corpus(corpus)
+    counts = surfer.walk(damping_factor, n)
+    return surfer.to_dict(counts)
 
-    # generate and count n-1 samples (already generated first one)
-    for _ in range(n - 1):
-        # for each new sample we're using the last sample as a start point
-        distribution = transition_model(corpus, last_sample, damping_factor)
-        current_sample = get_sample(distribution)
 
-        sample_counter[current_sample] += 1
-
-        last_sample = current_sample
+def parallel_sample_pagerank(corpus, damping_factor, tolerance,
+                             walkers=WALKERS, seed=None):
+    """
+    Return PageRank values for each page by sampling with many
+    independent random surfers in parallel, until the estimate is within
+    `tolerance` (L1) of the ranks from iterate_pagerank.
 
-    # calculate the proportions
-    PageRank_dict = dict()
-    for page in sample_counter:
-        PageRank_dict[page] = sample_counter[page] / n
+    Return the dictionary of PageRank values, and a list of
+    (samples, error) pairs tracking the error after each round.
+    """
+    surfer = RandomSurfer.from_corpus(corpus)
+    matrix = LinkMatrix.from_corpus(corpus)
+    reference = matrix.power_iteration(damping_factor)
 
-    return PageRank_dict
+    # both were built from the same corpus, so pages are in the same order
+    counts, history = parallel_walk(
+        surfer, damping_factor, reference, tolerance,
+        walkers=walkers, seed=seed
+    )
+    return surfer.to_dict(counts), history
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                     solver="power"):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
 
+    The corpus is turned into a sparse transition matrix once, then
+    ranks are updated with `solver` (one of solvers.SOLVERS) until they
+    change by less than `tolerance` in total. Pages without links count
+    as linking to every page.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    number_of_pages = len(corpus)
-
-    PageRank_dict = dict.fromkeys(corpus, 1 / number_of_pages)
-
-    # this helper dict will match every page with a set of all the pages that link to it
-    helper_dict = dict()
+    ranks, _ = iterate_pagerank_residuals(
+        corpus, damping_factor, tolerance, solver
+    )
+    return ranks
 
-    # populate the helper dict
-    for page in corpus.keys():
-        helper_dict[page] = set()
-        for page2 in corpus.keys():
-            if page in corpus[page2]:
-                helper_dict[page].add(page2)
 
-    convergence = False
-    while not convergence:
-        converged_values = 0
-        # process of calculating PageRank
-        for page in corpus.keys():
-            prev_value = PageRank_dict[page]
-
-            sumation = 0
-            for i in helper_dict[page]:
-                sumation += PageRank_dict[i] / len(corpus[i])
-
-            PageRank_dict[page] = (1 - damping_factor) / number_of_pages + \
-                damping_factor * sumation
-
-            if abs(PageRank_dict[page] - prev_value) < 0.001:
-                converged_values += 1
-
-        if converged_values == number_of_pages:
-            convergence = True
+def iterate_pagerank_residuals(corpus, damping_factor, tolerance=TOLERANCE,
+                               solver="power", max_iterations=MAX_ITERATIONS):
+    """
+    Same as iterate_pagerank, giving up after `max_iterations` sweeps.
 
-    return PageRank_dict
+    Return the dictionary of PageRank values, and the list of how much
+    each sweep changed the ranks (L1).
+    """
+    matrix = LinkMatrix.from_corpus(corpus)
+    ranks, residuals = solve(
+        matrix, damping_factor, solver, tolerance, max_iterations
+    )
+    return matrix.to_dict(ranks), residuals
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+import multiprocessing
+import os
+import random
+from array import array
+from operator import add
+
+from matrix import INDEX_TYPE
+
+# Samples each walker takes between two convergence checks
+ROUND = 10000
+
+# Independent walkers used by parallel_walk
+WALKERS = os.cpu_count() or 1
+
+# Give up on reaching the tolerance after this many samples
+MAX_SAMPLES = 10 ** 8
+
+# Surfer the worker processes walk on, inherited when they are forked
+worker_surfer = None
+
+
+class RandomSurfer():
+    """
+    Random surfer over a corpus, precomputed for constant time steps.
+
+    The outgoing links of page `i` are `targets[offsets[i]:offsets[i + 1]]`.
+    The transition model is a mix of two uniform choices: with probability
+    `damping_factor` a random link of the current page, otherwise (or if
+    the page has no links) a random page of the corpus. Drawing from it
+    takes two random numbers and an array lookup, instead of building the
+    full distribution over the corpus at every step.
+    """
+
+    def __init__(self, pages, offsets, targets):
+        self.pages = pages
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds the surfer from a dictionary mapping every page to the
+        set of pages it links to. Links outside the corpus are ignored.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        edges = (
+            (index[page], index[link])
+            for page in pages for link in corpus[page]
+            if link in index and link != page
+        )
+        return cls.from_edges(pages, edges)
+
+    @classmethod
+    def from_edges(cls, pages, edges):
+        """
+        Builds the surfer from a list of pages and an iterable of
+        (source, target) page numbers, each link listed once.
+        """
+        sources = array(INDEX_TYPE)
+        targets = array(INDEX_TYPE)
+        for source, target in edges:
+            sources.append(source)
+            targets.append(target)
+
+        # bucket the targets by source
+        offsets = array(INDEX_TYPE, [0]) * (len(pages) + 1)
+        for source in sources:
+            offsets[source + 1] += 1
+        for page in range(len(pages)):
+            offsets[page + 1] += offsets[page]
+        ordered = array(INDEX_TYPE, [0]) * len(targets)
+        cursor = offsets[:-1]
+        for source, target in zip(sources, targets):
+            ordered[cursor[source]] = target
+            cursor[source] += 1
+
+        return cls(pages, offsets, ordered)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def edges(self):
+        """Yields every link as a (source, target) pair of page numbers."""
+        offsets = self.offsets
+        targets = self.targets
+        for source in range(len(self.pages)):
+            for target in targets[offsets[source]:offsets[source + 1]]:
+                yield source, target
+
+    def walk(self, damping_factor, n, rng=random):
+        """
+        Samples `n` pages, starting with a page at random and then
+        following the transition model from the last sample.
+
+        Returns a list counting the visits to each page.
+        """
+        counts, _ = self.run(damping_factor, n, rng)
+        return counts
+
+    def run(self, damping_factor, n, rng=random, page=None):
+        """
+        Samples `n` pages following the transition model, continuing
+        from `page`, or starting with a page at random if None.
+
+        Returns a list counting the visits to each page, and the last page.
+        """
+        size = len(self.pages)
+        offsets = self.offsets
+        targets = self.targets
+        draw = rng.random
+
+        counts = [0] * size
+        if n <= 0:
+            return counts, page
+
+        if page is None:
+            page = int(draw() * size)
+            counts[page] += 1
+            n -= 1
+        for _ in range(n):
+            start = offsets[page]
+            links = offsets[page + 1] - start
+            if links and draw() < damping_factor:
+                page = targets[start + int(draw() * links)]
+            else:
+                page = int(draw() * size)
+            counts[page] += 1
+        return counts, page
+
+    def to_dict(self, counts):
+        """Returns a dictionary mapping each page to its share of visits."""
+        total = sum(counts)
+        return {
+            page: count / total for page, count in zip(self.pages, counts)
+        }
+
+
+def parallel_walk(surfer, damping_factor, reference, tolerance,
+                  walkers=WALKERS, max_samples=MAX_SAMPLES, seed=None,
+                  processes=None):
+    """
+    Runs `walkers` independent random surfers, each with its own random
+    stream seeded from `seed`, over a pool of forked processes. After
+    every round of ROUND samples per walker their visits are merged and
+    compared with the `reference` ranks (from iterate_pagerank).
+
+    Stops once the L1 error is below `tolerance` or after `max_samples`.
+
+    Returns the merged visit counts and the history of (samples, error)
+    after each round.
+    """
+    master = random.Random(seed)
+    states = [
+        random.Random(master.getrandbits(64)).getstate()
+        for _ in range(walkers)
+    ]
+    pages = [None] * walkers
+
+    totals = [0] * len(surfer)
+    samples = 0
+    history = []
+
+    pool = None
+    if processes != 1 and "fork" in multiprocessing.get_all_start_methods():
+        pool = multiprocessing.get_context("fork").Pool(
+            processes, initializer=init_worker, initargs=(surfer,)
+        )
+        run_all = pool.map
+    else:
+        init_worker(surfer)
+
+        def run_all(function, jobs):
+            return [function(job) for job in jobs]
+
+    try:
+        while samples < max_samples:
+            steps = min(ROUND, max(1, (max_samples - samples) // walkers))
+            jobs = [
+                (damping_factor, steps, states[walker], pages[walker])
+                for walker in range(walkers)
+            ]
+            for walker, (counts, state, page) in enumerate(
+                run_all(walk_round, jobs)
+            ):
+                totals = list(map(add, totals, counts))
+                states[walker] = state
+                pages[walker] = page
+            samples += steps * walkers
+
+            error = sum(
+                abs(count / samples - rank)
+                for count, rank in zip(totals, reference)
+            )
+            history.append((samples, error))
+            if error < tolerance:
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return totals, history
+
+
+def init_worker(surfer):
+    global worker_surfer
+    worker_surfer = surfer
+
+
+def walk_round(job):
+    """
+    Continues one walker for a round, from its random state and page
+
+    Returns its visit counts, new random state and last page
+    """
+    damping_factor, steps, state, page = job
+    rng = random.Random()
+    rng.setstate(state)
+    counts, page = worker_surfer.run(damping_factor, steps, rng, page)
+    return array("q", counts), rng.getstate(), page
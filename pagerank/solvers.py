@@ -0,0 +1,186 @@
+from operator import mul
+
+from matrix import MAX_ITERATIONS, TOLERANCE
+
+# Power steps between two Aitken extrapolations
+EXTRAPOLATION_PERIOD = 10
+
+
+def solve(matrix, damping_factor, solver="power", tolerance=TOLERANCE,
+          max_iterations=MAX_ITERATIONS):
+    """
+    Computes the ranks of a LinkMatrix with one of the SOLVERS, stopping
+    once a sweep changes the ranks by less than `tolerance` (L1) or after
+    `max_iterations` sweeps.
+
+    Returns the list of ranks, in the order of `matrix.pages`, and the
+    change made by each sweep.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver {solver!r}, "
+                         f"expected one of {', '.join(SOLVERS)}")
+    return SOLVERS[solver](matrix, damping_factor, tolerance, max_iterations)
+
+
+def power(matrix, damping_factor, tolerance, max_iterations):
+    """Plain power iteration, every page updated from the last sweep."""
+    n = len(matrix)
+    in_links = matrix.in_links()
+    ranks = [1 / n] * n
+    residuals = []
+
+    for _ in range(max_iterations):
+        new_ranks = matrix.step(ranks, damping_factor, in_links=in_links)
+        residuals.append(change(new_ranks, ranks))
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            break
+    return ranks, residuals
+
+
+def gauss_seidel(matrix, damping_factor, tolerance, max_iterations):
+    """
+    Updates the ranks in place, so pages later in a sweep already read
+    the new ranks of pages before them. The ranks are scaled back to sum
+    to 1 after every sweep.
+    """
+    n = len(matrix)
+    d = damping_factor
+    in_links = matrix.in_links()
+    inverse_degree = matrix.inverse_degree
+    ranks = [1 / n] * n
+    shares = list(map(mul, ranks, inverse_degree))
+    share_of = shares.__getitem__
+    residuals = []
+
+    for _ in range(max_iterations):
+        dangling = sum(map(ranks.__getitem__, matrix.dangling))
+        base = ((1 - d) + d * dangling) / n
+
+        total_change = 0.0
+        for page, links in enumerate(in_links):
+            rank = base + d * sum(map(share_of, links))
+            total_change += abs(rank - ranks[page])
+            ranks[page] = rank
+            shares[page] = rank * inverse_degree[page]
+
+        total = sum(ranks)
+        ranks[:] = [rank / total for rank in ranks]
+        shares[:] = map(mul, ranks, inverse_degree)
+
+        residuals.append(total_change)
+        if total_change < tolerance:
+            break
+    return ranks, residuals
+
+
+def extrapolation(matrix, damping_factor, tolerance, max_iterations):
+    """
+    Power iteration that, every EXTRAPOLATION_PERIOD sweeps, jumps ahead
+    with Aitken's delta squared over the last three iterates, cancelling
+    the slowest decaying error term. A jump that makes the next sweep
+    change more than the one before it is undone.
+    """
+    n = len(matrix)
+    in_links = matrix.in_links()
+    ranks = [1 / n] * n
+    previous = []
+    before_jump = None
+    residuals = []
+
+    for iteration in range(1, max_iterations + 1):
+        new_ranks = matrix.step(ranks, damping_factor, in_links=in_links)
+        residuals.append(change(new_ranks, ranks))
+        if before_jump is not None:
+            saved, residual = before_jump
+            before_jump = None
+            if residuals[-1] > residual:
+                ranks = saved
+                continue
+        previous = (previous + [ranks])[-2:]
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            break
+
+        if iteration % EXTRAPOLATION_PERIOD == 0 and len(previous) == 2:
+            before_jump = (ranks, residuals[-1])
+            ranks = aitken(*previous, ranks)
+            previous = []
+    return ranks, residuals
+
+
+def aitken(first, second, third):
+    """
+    Returns the page by page Aitken extrapolation of three consecutive
+    iterates, scaled to sum to 1. Pages that did not move steadily in one
+    direction, where the extrapolation would overshoot, keep the latest
+    rank.
+    """
+    ranks = []
+    for x0, x1, x2 in zip(first, second, third):
+        rank = x2
+        if (x2 - x1) * (x1 - x0) > 0:
+            extrapolated = x2 - (x2 - x1) ** 2 / (x2 - 2 * x1 + x0)
+            if extrapolated > 0:
+                rank = extrapolated
+        ranks.append(rank)
+    total = sum(ranks)
+    return [rank / total for rank in ranks]
+
+
+def adaptive(matrix, damping_factor, tolerance, max_iterations):
+    """
+    Power iteration that stops recomputing pages once they change by
+    less than tolerance / N in a sweep, since most pages settle long
+    before the slowest ones. When no page is left, a full sweep checks
+    the result, and every page is thawed again if it is still too far.
+    """
+    n = len(matrix)
+    d = damping_factor
+    in_links = matrix.in_links()
+    inverse_degree = matrix.inverse_degree
+    threshold = tolerance / n
+    ranks = [1 / n] * n
+    active = list(range(n))
+    residuals = []
+
+    for _ in range(max_iterations):
+        share_of = list(map(mul, ranks, inverse_degree)).__getitem__
+        dangling = sum(map(ranks.__getitem__, matrix.dangling))
+        base = ((1 - d) + d * dangling) / n
+
+        new_ranks = list(ranks)
+        still_active = []
+        total_change = 0.0
+        for page in active:
+            rank = base + d * sum(map(share_of, in_links[page]))
+            difference = abs(rank - ranks[page])
+            total_change += difference
+            new_ranks[page] = rank
+            if difference >= threshold:
+                still_active.append(page)
+        ranks = new_ranks
+        residuals.append(total_change)
+
+        if len(active) == n and total_change < tolerance:
+            break
+        if not still_active or total_change < tolerance:
+            still_active = list(range(n))
+        active = still_active
+
+    total = sum(ranks)
+    return [rank / total for rank in ranks], residuals
+
+
+def change(new_ranks, ranks):
+    """Returns the L1 distance between two lists of ranks."""
+    return sum(abs(new - old) for new, old in zip(new_ranks, ranks))
+
+
+# Solvers selectable by name, in the order they are listed to users
+SOLVERS = {
+    "power": power,
+    "gauss-seidel": gauss_seidel,
+    "extrapolation": extrapolation,
+    "adaptive": adaptive,
+}